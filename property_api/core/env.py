@@ -14,6 +14,11 @@ env = environ.Env(
 
     # Database
     DATABASE_URL             = (str, 'sqlite:///db.sqlite3'),
+    PROPERTY_SNAPSHOT_PATH   = (str, ''),
+    PROPERTY_REPLICA_URLS    = (list, []),
+
+    # Caching
+    PROPERTY_CACHE_WARMING_URL = (str, 'http://localhost:8000'),
 
     # Secret
     SECRET_KEY               = (str, 'secret'),
@@ -0,0 +1,204 @@
+import threading
+from itertools import islice
+
+import numpy as np
+
+from .dataset import get_dataset_version
+from .models import Property
+
+
+# Columns held as float64 arrays, NULL as NaN
+NUMERIC_COLUMNS = (
+    'total_assessed_value', 'land_assessed_value', 'building_assessed_value',
+    'square_footage_land', 'env_flood_fs_factor', 'env_airport_noise_dnl',
+    'access_cmap_walk_total_score',
+)
+
+# Columns held dictionary-encoded: int32 codes into a sorted category list, NULL as -1
+CATEGORICAL_COLUMNS = (
+    'class_code', 'zip_code', 'ward_num', 'vacancy_type', 'township_name',
+    'chicago_community_area_name', 'triad_name', 'property_city',
+)
+
+QUANTILE_FUNCTIONS = {'median': 0.5, 'p25': 0.25, 'p75': 0.75, 'p90': 0.9, 'p99': 0.99}
+AGGREGATE_FUNCTIONS = ('count', 'sum', 'mean', 'min', 'max', 'histogram', *QUANTILE_FUNCTIONS)
+
+
+class ColumnStore:
+    """
+    Property columns held in memory as NumPy arrays for vectorized
+    group-by aggregation.
+
+    Aggregates ignore NULLs. ``count`` counts rows, so it takes no column.
+    """
+
+    def __init__(self, numeric, categorical, size):
+        self.numeric = numeric
+        self.categorical = categorical
+        self.size = size
+
+    @classmethod
+    def load(cls, chunk_size=5000):
+        """
+        Read the columns in one pass, turning each chunk of rows into arrays
+        as it arrives, so no row-wise copy of the table is ever held
+        """
+        columns = NUMERIC_COLUMNS + CATEGORICAL_COLUMNS
+        rows = Property.objects.order_by().values_list(*columns).iterator(chunk_size=chunk_size)
+
+        numeric_chunks = {name: [] for name in NUMERIC_COLUMNS}
+        code_chunks = {name: [] for name in CATEGORICAL_COLUMNS}
+        # Per categorical column: value -> code, in order of first appearance
+        first_seen = {name: {} for name in CATEGORICAL_COLUMNS}
+        size = 0
+        for chunk in iter(lambda: list(islice(rows, chunk_size)), []):
+            size += len(chunk)
+            values = list(zip(*chunk))
+            for name, column in zip(NUMERIC_COLUMNS, values):
+                numeric_chunks[name].append(np.array(column, dtype=np.float64))
+            for name, column in zip(CATEGORICAL_COLUMNS, values[len(NUMERIC_COLUMNS):]):
+                seen = first_seen[name]
+                code_chunks[name].append(np.fromiter(
+                    (-1 if value is None else seen.setdefault(value, len(seen)) for value in column),
+                    dtype=np.int32, count=len(column),
+                ))
+
+        numeric = {
+            name: np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float64)
+            for name, chunks in numeric_chunks.items()
+        }
+        categorical = {}
+        for name, chunks in code_chunks.items():
+            seen = first_seen[name]
+            categories = sorted(seen)
+            # First-seen code -> position in the sorted categories; the extra
+            # last slot keeps NULL (-1) at -1
+            remap = np.full(len(seen) + 1, -1, dtype=np.int32)
+            remap[[seen[category] for category in categories]] = np.arange(len(categories), dtype=np.int32)
+            codes = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int32)
+            categorical[name] = (remap[codes], categories)
+        return cls(numeric, categorical, size)
+
+    def _filter_mask(self, filters):
+        mask = np.ones(self.size, dtype=bool)
+        for name, value in filters.items():
+            codes, categories = self.categorical[name]
+            # Query strings are compared against the categories' string form
+            matches = [index for index, category in enumerate(categories) if str(category) == value]
+            mask &= np.isin(codes, matches)
+        return mask
+
+    def _groups(self, group_by, mask):
+        """Return (group keys, group index per selected row)"""
+        if not group_by:
+            return [()], np.zeros(int(mask.sum()), dtype=np.int64)
+
+        # Shift codes so NULL (-1) becomes 0, then combine them into one group id
+        shifted = [self.categorical[name][0][mask].astype(np.int64) + 1 for name in group_by]
+        dims = [len(self.categorical[name][1]) + 1 for name in group_by]
+        group_ids = np.ravel_multi_index(shifted, dims) if shifted[0].size else np.zeros(0, dtype=np.int64)
+        unique_ids, inverse = np.unique(group_ids, return_inverse=True)
+
+        keys = []
+        for indices in zip(*np.unravel_index(unique_ids, dims)):
+            keys.append(tuple(
+                None if code == 0 else self.categorical[name][1][code - 1]
+                for name, code in zip(group_by, indices)
+            ))
+        return keys, inverse
+
+    def aggregate(self, group_by=(), metrics=(('count', None),), filters=None, bins=10):
+        """
+        Group the (filtered) rows by categorical columns and compute metrics.
+
+        ``metrics`` are (function, column) pairs. Returns (rows, bin_edges):
+        one dict per group with the group columns and a key per metric, plus
+        the shared bin edges of each histogram column.
+        """
+        mask = self._filter_mask(filters or {})
+        keys, inverse = self._groups(list(group_by), mask)
+        group_count = len(keys)
+
+        results = {}
+        bin_edges = {}
+        for function, column in metrics:
+            name = function if column is None else f'{function}_{column}'
+            if function == 'count':
+                results[name] = np.bincount(inverse, minlength=group_count)
+                continue
+
+            values = self.numeric[column][mask]
+            present = ~np.isnan(values)
+            group_of, values = inverse[present], values[present]
+            counts = np.bincount(group_of, minlength=group_count)
+
+            if function in ('sum', 'mean'):
+                sums = np.bincount(group_of, weights=values, minlength=group_count)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    results[name] = sums if function == 'sum' else sums / counts
+            elif function == 'histogram':
+                edges = np.linspace(values.min(), values.max(), bins + 1) if values.size else np.zeros(bins + 1)
+                bucket = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, bins - 1)
+                results[name] = np.bincount(
+                    group_of * bins + bucket, minlength=group_count * bins
+                ).reshape(group_count, bins)
+                bin_edges[column] = edges.tolist()
+            else:
+                results[name] = self._ordered_statistic(function, group_of, values, counts)
+
+        rows = []
+        for index, key in enumerate(keys):
+            row = dict(zip(group_by, key))
+            for name, values in results.items():
+                value = values[index]
+                if isinstance(value, np.ndarray):
+                    row[name] = value.tolist()
+                else:
+                    value = value.item()
+                    row[name] = None if isinstance(value, float) and np.isnan(value) else value
+            rows.append(row)
+        return rows, bin_edges
+
+    @staticmethod
+    def _ordered_statistic(function, group_of, values, counts):
+        """min, max and quantiles from one sort by (group, value), interpolating linearly"""
+        order = np.lexsort((values, group_of))
+        ordered = values[order]
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        empty = counts == 0
+
+        if function == 'min':
+            positions = starts.astype(np.float64)
+        elif function == 'max':
+            positions = (starts + counts - 1).astype(np.float64)
+        else:
+            positions = starts + QUANTILE_FUNCTIONS[function] * (counts - 1)
+
+        positions = np.where(empty, 0, positions)
+        lower = np.floor(positions).astype(np.int64)
+        upper = np.ceil(positions).astype(np.int64)
+        if not ordered.size:
+            return np.full(len(counts), np.nan)
+        fraction = positions - lower
+        result = ordered[lower] + (ordered[upper] - ordered[lower]) * fraction
+        return np.where(empty, np.nan, result)
+
+
+# Per-worker store: (dataset version, ColumnStore)
+_column_store = (None, None)
+_column_store_lock = threading.Lock()
+
+
+def get_column_store():
+    """Return the column store for the current dataset version, loading it once per worker"""
+    global _column_store
+    version = get_dataset_version().version
+    loaded_version, store = _column_store
+    if loaded_version == version:
+        return store
+    with _column_store_lock:
+        loaded_version, store = _column_store
+        if loaded_version != version:
+            store = ColumnStore.load()
+            _column_store = (version, store)
+    return store
@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class PropertyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core.property'
-    verbose_name = 'Property Management' 
\ No newline at end of file
+    verbose_name = 'Property Management'
+
+    def ready(self):
+        from .snapshot import connect_snapshot_signals
+        connect_snapshot_signals()
@@ -0,0 +1,499 @@
+import gzip
+import hashlib
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .dataset import get_dataset_version
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, gzip is always available
+    brotli = None
+
+
+_MISSING = object()
+
+
+def normalized_params(query_dict):
+    """Query parameters as a sorted list of pairs, ignoring order and empty values"""
+    return sorted(
+        (key, value)
+        for key in query_dict
+        for value in query_dict.getlist(key)
+        if value != ''
+    )
+
+
+def hash_key_parts(*parts):
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def normalized_query_key(request):
+    """
+    Hash of the request's query parameters, independent of their order,
+    plus the Accept header since it selects the renderer
+    """
+    return hash_key_parts(normalized_params(request.GET), request.META.get('HTTP_ACCEPT', ''))
+
+
+class SingleFlight:
+    """
+    Collapses concurrent recomputation of the same cache entry.
+
+    Within a process, threads missing the same key serialize on a per-key
+    lock and re-check the cache once they get it. Across processes, the
+    thread that recomputes first takes a lease with ``cache.add``. Everyone
+    else gets the last known (stale) value when there is one, or polls
+    briefly for the fresh value. Recomputing only happens when the lease
+    holder does not deliver within ``PROPERTY_SINGLE_FLIGHT_WAIT`` in total.
+
+    Callers scope ``stale_key`` to the dataset version, so a stale value only
+    ever covers an expired entry of the same version and never outlives an
+    import.
+    """
+
+    def __init__(self, backend=cache):
+        self.backend = backend
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _checkout_lock(self, key):
+        with self._locks_guard:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def _return_lock(self, key):
+        with self._locks_guard:
+            entry = self._locks[key]
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    def get_or_set(self, key, compute, timeout, stale_key=None):
+        """
+        Return the cached value for key, computing it at most once across
+        concurrent callers. A compute() result of None is returned but not cached.
+        """
+        value = self.backend.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        stale = self.backend.get(stale_key, _MISSING) if stale_key else _MISSING
+        deadline = time.monotonic() + settings.PROPERTY_SINGLE_FLIGHT_WAIT
+        lock = self._checkout_lock(key)
+        try:
+            if stale is not _MISSING:
+                # Someone in this process is already recomputing: serve stale
+                if not lock.acquire(blocking=False):
+                    return stale
+            elif not lock.acquire(timeout=settings.PROPERTY_SINGLE_FLIGHT_WAIT):
+                return self._wait_or_compute(key, compute, timeout, stale_key, deadline)
+
+            try:
+                value = self.backend.get(key, _MISSING)
+                if value is not _MISSING:
+                    return value
+
+                lease_key = f'{key}:lease'
+                if not self.backend.add(lease_key, True, settings.PROPERTY_SINGLE_FLIGHT_LEASE):
+                    # Another process holds the lease
+                    if stale is not _MISSING:
+                        return stale
+                    return self._wait_or_compute(key, compute, timeout, stale_key, deadline)
+
+                try:
+                    return self._compute_and_store(key, compute, timeout, stale_key)
+                finally:
+                    self.backend.delete(lease_key)
+            finally:
+                lock.release()
+        finally:
+            self._return_lock(key)
+
+    def _compute_and_store(self, key, compute, timeout, stale_key):
+        value = compute()
+        if value is not None:
+            self.backend.set(key, value, timeout)
+            if stale_key:
+                # Outlives the fresh entry so it can cover the next recomputation
+                self.backend.set(stale_key, value, None if timeout is None else timeout * 2)
+        return value
+
+    def _wait_or_compute(self, key, compute, timeout, stale_key, deadline):
+        """Poll for the lease holder's result until deadline, then compute it ourselves"""
+        while time.monotonic() < deadline:
+            time.sleep(settings.PROPERTY_SINGLE_FLIGHT_POLL_INTERVAL)
+            value = self.backend.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+        return self._compute_and_store(key, compute, timeout, stale_key)
+
+
+single_flight = SingleFlight()
+
+
+class TwoTierCache:
+    """
+    Bounded per-worker LRU with a TTL in front of a shared cache backend.
+
+    Reads are served from worker memory when possible, skipping the network
+    round trip and unpickling. The local tier is flushed whenever the
+    dataset generation changes. ``add`` always goes to the shared backend,
+    so single-flight leases stay visible across workers. Implements the
+    subset of the Django cache API the property caches use.
+    """
+
+    def __init__(self, backend=cache, maxsize=1024, ttl=30):
+        self.backend = backend
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = None
+
+    def _check_generation(self):
+        generation = get_dataset_version().version
+        if generation != self._generation:
+            with self._lock:
+                self._local.clear()
+                self._generation = generation
+
+    def _store_local(self, key, value):
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.ttl, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+
+    def get(self, key, default=None):
+        self._check_generation()
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if time.monotonic() < expires_at:
+                    self._local.move_to_end(key)
+                    return value
+                del self._local[key]
+
+        value = self.backend.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        self._store_local(key, value)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self._check_generation()
+        self.backend.set(key, value, timeout)
+        self._store_local(key, value)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT):
+        return self.backend.add(key, value, timeout)
+
+    def delete(self, key):
+        with self._lock:
+            self._local.pop(key, None)
+        return self.backend.delete(key)
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+
+class PropertyCache:
+    """
+    Read-through cache for property endpoint data.
+
+    Keys embed the dataset version (generation), which the import commands
+    bump on completion. Invalidation is a single increment, and entries from
+    an older generation are never read again; they simply expire. Misses go
+    through single-flight, so an invalidation triggers one recomputation per
+    key rather than one per concurrent request.
+    """
+
+    def __init__(self, backend=cache, prefix='property:data'):
+        self.backend = backend
+        self.prefix = prefix
+        self.single_flight = SingleFlight(backend)
+
+    def make_key(self, namespace, *parts, version=None):
+        return '{prefix}:{namespace}:{version}:{digest}'.format(
+            prefix=self.prefix,
+            namespace=namespace,
+            version=get_dataset_version().version if version is None else version,
+            digest=hash_key_parts(*parts),
+        )
+
+    def get_or_set(self, namespace, parts, compute, timeout=None):
+        """Return the cached value for (namespace, parts), computing it on a miss"""
+        key = self.make_key(namespace, *parts)
+        return self.single_flight.get_or_set(
+            key,
+            compute,
+            settings.PROPERTY_CACHE_TIMEOUT if timeout is None else timeout,
+            stale_key=f'{key}:stale',
+        )
+
+
+# Hot detail, search and statistics reads are served from worker memory
+property_cache = PropertyCache(
+    backend=TwoTierCache(
+        maxsize=settings.PROPERTY_LOCAL_CACHE_SIZE,
+        ttl=settings.PROPERTY_LOCAL_CACHE_TTL,
+    )
+)
+
+
+class LFUCache:
+    """
+    Bounded in-process least-frequently-used cache.
+
+    Entries live in per-frequency buckets so lookups, inserts and evictions
+    are O(1); ties within a frequency are evicted least recently used first.
+    The cache is tied to a dataset version and empties itself when the
+    version changes. Hit and miss counts are kept for ``stats()``, and a
+    named cache publishes them to the shared cache at most every
+    ``PROPERTY_SEARCH_CACHE_STATS_INTERVAL`` seconds.
+    """
+
+    def __init__(self, maxsize, name=None):
+        self.maxsize = maxsize
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._version = None
+        self._published_at = None
+        self._clear()
+
+    def _clear(self):
+        self._values = {}
+        self._frequencies = {}
+        self._buckets = defaultdict(OrderedDict)
+        self._min_frequency = 0
+
+    def _touch(self, key):
+        frequency = self._frequencies[key]
+        bucket = self._buckets[frequency]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[frequency]
+            if self._min_frequency == frequency:
+                self._min_frequency = frequency + 1
+        self._frequencies[key] = frequency + 1
+        self._buckets[frequency + 1][key] = None
+
+    def _insert(self, key, value):
+        if len(self._values) >= self.maxsize:
+            bucket = self._buckets[self._min_frequency]
+            evicted, _ = bucket.popitem(last=False)
+            if not bucket:
+                del self._buckets[self._min_frequency]
+            del self._values[evicted]
+            del self._frequencies[evicted]
+        self._values[key] = value
+        self._frequencies[key] = 1
+        self._buckets[1][key] = None
+        self._min_frequency = 1
+
+    def get_or_set(self, key, compute):
+        """Return the cached value for key, computing it outside the lock on a miss"""
+        version = get_dataset_version().version
+        with self._lock:
+            if version != self._version:
+                self._clear()
+                self._version = version
+            publish = self._publish_due()
+            if key in self._values:
+                self.hits += 1
+                self._touch(key)
+                value = self._values[key]
+            else:
+                self.misses += 1
+                value = _MISSING
+
+        if publish:
+            publish_lfu_stats(self.name, self.stats())
+        if value is not _MISSING:
+            return value
+
+        value = compute()
+
+        with self._lock:
+            if version == self._version and key not in self._values and self.maxsize > 0:
+                self._insert(key, value)
+        return value
+
+    def _publish_due(self):
+        """Whether this lookup should publish the stats; called with the lock held"""
+        if self.name is None:
+            return False
+        now = time.monotonic()
+        interval = settings.PROPERTY_SEARCH_CACHE_STATS_INTERVAL
+        if self._published_at is not None and now - self._published_at < interval:
+            return False
+        self._published_at = now
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._values),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'dataset_version': self._version,
+            }
+
+
+def normalize_search_query(query):
+    """
+    Case insensitive form of a search query, for cache keys. Inner whitespace
+    is kept, since icontains matches it literally.
+    """
+    return query.strip().casefold()
+
+
+LFU_STATS_KEY = 'property:lfu_stats'
+
+
+def publish_lfu_stats(name, stats):
+    """Store one worker's stats for an LFU cache in the shared cache, for search_cache_stats"""
+    worker = f'{socket.gethostname()}:{os.getpid()}'
+    key = f'{LFU_STATS_KEY}:{name}:{worker}'
+    # Expires unless republished, so workers that have exited drop out of the report
+    cache.set(
+        key, {**stats, 'cache': name, 'worker': worker, 'published_at': time.time()},
+        timeout=settings.PROPERTY_SEARCH_CACHE_STATS_INTERVAL * 5
+    )
+    keys = cache.get(LFU_STATS_KEY, set())
+    if key not in keys:
+        cache.set(LFU_STATS_KEY, keys | {key}, timeout=None)
+
+
+def get_lfu_stats():
+    """Return the stats every live worker has published, sorted by cache and worker"""
+    keys = cache.get(LFU_STATS_KEY, set())
+    stats = cache.get_many(list(keys))
+    if len(stats) < len(keys):
+        cache.set(LFU_STATS_KEY, set(stats), timeout=None)
+    return sorted(stats.values(), key=lambda item: (item['cache'], item['worker']))
+
+
+# Search traffic is heavily skewed toward a few queries, so keep them in worker memory
+search_cache = LFUCache(settings.PROPERTY_SEARCH_CACHE_SIZE, name='search')
+autocomplete_cache = LFUCache(settings.PROPERTY_SEARCH_CACHE_SIZE, name='autocomplete')
+
+
+def accepted_encodings(request):
+    """Return the content codings the client accepts (q > 0)"""
+    encodings = set()
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            encodings.add(coding.lower())
+    return encodings
+
+
+def build_compressed_entry(response):
+    """Compress a rendered response once into every supported encoding"""
+    content = response.content
+    entry = {
+        'content_type': response['Content-Type'],
+        'identity': content,
+        'gzip': gzip.compress(content, compresslevel=9),
+    }
+    if brotli is not None:
+        entry['br'] = brotli.compress(content, quality=11)
+    return entry
+
+
+def serve_compressed_entry(request, entry):
+    """Build a response from the best cached variant the client accepts"""
+    encodings = accepted_encodings(request)
+    for encoding in ('br', 'gzip'):
+        if encoding in entry and encoding in encodings:
+            response = HttpResponse(entry[encoding], content_type=entry['content_type'])
+            response['Content-Encoding'] = encoding
+            break
+    else:
+        response = HttpResponse(entry['identity'], content_type=entry['content_type'])
+
+    response['Content-Length'] = str(len(response.content))
+    patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+    return response
+
+
+def cache_compressed_response(view):
+    """
+    Cache a view's rendered payload as identity, gzip and brotli variants.
+
+    Entries are keyed by path, normalized query parameters and dataset
+    version, so an import invalidates them and repeat requests are served
+    without re-serializing or re-compressing. Only 200 responses are cached,
+    and rebuilds are single-flighted.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+
+        # The host is part of the key because paginated payloads embed absolute links
+        key_format = 'property:compressed:{version}:{host}{path}:{query}'
+        key_parts = {
+            'host': request.get_host(),
+            'path': request.path,
+            'query': normalized_query_key(request),
+        }
+        uncacheable = None
+
+        def render_entry():
+            nonlocal uncacheable
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+            if response.status_code != 200 or response.streaming:
+                uncacheable = response
+                return None
+            return build_compressed_entry(response)
+
+        # Stale entries stay within the version, so the outer dataset ETag always matches the body
+        key = key_format.format(version=get_dataset_version().version, **key_parts)
+        entry = single_flight.get_or_set(
+            key,
+            render_entry,
+            settings.PROPERTY_COMPRESSED_CACHE_TIMEOUT,
+            stale_key=f'{key}:stale',
+        )
+        if entry is None:
+            return uncacheable
+
+        return serve_compressed_entry(request, entry)
+
+    return wrapper
@@ -0,0 +1,115 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import DatasetVersion, Property
+
+
+DATASET_VERSION_CACHE_KEY = 'property:dataset_version'
+
+
+# Per-worker copy of the shared generation key: (DatasetVersion, monotonic expiry)
+_local_dataset_version = (None, 0.0)
+
+
+def _remember_locally(dataset_version):
+    global _local_dataset_version
+    _local_dataset_version = (
+        dataset_version,
+        time.monotonic() + settings.PROPERTY_DATASET_VERSION_LOCAL_TTL
+    )
+
+
+def get_dataset_version():
+    """
+    Return the current DatasetVersion.
+
+    Read from worker memory, then the shared cache, then the database. A
+    worker re-checks the shared generation key at most once every
+    PROPERTY_DATASET_VERSION_LOCAL_TTL seconds, which is how a bump reaches
+    every worker without a round trip per request.
+    """
+    dataset_version, expires_at = _local_dataset_version
+    if dataset_version is not None and time.monotonic() < expires_at:
+        return dataset_version
+
+    dataset_version = cache.get(DATASET_VERSION_CACHE_KEY)
+    if dataset_version is None:
+        dataset_version = DatasetVersion.objects.filter(pk=1).first() or DatasetVersion(pk=1)
+        cache.set(
+            DATASET_VERSION_CACHE_KEY, dataset_version,
+            settings.PROPERTY_DATASET_VERSION_CACHE_TIMEOUT
+        )
+    _remember_locally(dataset_version)
+    return dataset_version
+
+
+def bump_dataset_version(announce=True):
+    """
+    Increment the dataset version; called by the import commands on completion.
+
+    With announce=False only this process sees the new version until
+    announce_dataset_version is called, for imports that still have to
+    publish a snapshot before readers may cache anything under it.
+    """
+    with transaction.atomic():
+        dataset_version, _ = DatasetVersion.objects.select_for_update().get_or_create(pk=1)
+        dataset_version.version = F('version') + 1
+        dataset_version.save()
+    dataset_version.refresh_from_db()
+
+    if announce:
+        announce_dataset_version(dataset_version)
+    else:
+        _remember_locally(dataset_version)
+    return dataset_version
+
+
+def announce_dataset_version(dataset_version):
+    """Publish a dataset version through the shared generation key"""
+    cache.set(
+        DATASET_VERSION_CACHE_KEY, dataset_version,
+        settings.PROPERTY_DATASET_VERSION_CACHE_TIMEOUT
+    )
+    _remember_locally(dataset_version)
+
+
+# Conditional GET
+# Used with django.views.decorators.http.condition, so a matching
+# If-None-Match / If-Modified-Since is answered with 304 before the view runs.
+# ETags are weak because the same version may be served gzip, brotli or plain.
+
+def dataset_etag(request, *args, **kwargs):
+    return f'W/"dataset-{get_dataset_version().version}"'
+
+
+def dataset_last_modified(request, *args, **kwargs):
+    return get_dataset_version().updated_at
+
+
+def _property_updated_at(request, pin):
+    """Look up a row's updated_at once per request, shared by both callbacks"""
+    if not hasattr(request, '_property_updated_at'):
+        request._property_updated_at = Property.objects.filter(pin=pin) \
+                                                       .values_list('updated_at', flat=True) \
+                                                       .first()
+    return request._property_updated_at
+
+
+def property_etag(request, pin, *args, **kwargs):
+    updated_at = _property_updated_at(request, pin)
+    if updated_at is None:
+        # Unknown PIN: let the view produce its 404
+        return None
+    return f'W/"dataset-{get_dataset_version().version}-{int(updated_at.timestamp() * 1000000)}"'
+
+
+def property_last_modified(request, pin, *args, **kwargs):
+    updated_at = _property_updated_at(request, pin)
+    if updated_at is None:
+        return None
+    dataset_updated_at = get_dataset_version().updated_at
+    return max(updated_at, dataset_updated_at) if dataset_updated_at else updated_at
@@ -0,0 +1,77 @@
+from .dataset import get_dataset_version
+from .models import District
+
+
+# District kind -> the Property column holding its code. The API exposes
+# each district's name as f'{kind}_name'.
+DISTRICT_CODE_FIELDS = {
+    'school_elementary_district': 'school_elementary_district_geoid',
+    'school_secondary_district': 'school_secondary_district_geoid',
+    'school_unified_district': 'school_unified_district_geoid',
+    'tax_municipality': 'tax_municipality_num',
+    'tax_school_elementary_district': 'tax_school_elementary_district_num',
+    'tax_school_secondary_district': 'tax_school_secondary_district_num',
+    'tax_community_college_district': 'tax_community_college_district_num',
+    'tax_fire_protection_district': 'tax_fire_protection_district_num',
+    'tax_library_district': 'tax_library_district_num',
+    'tax_park_district': 'tax_park_district_num',
+    'tax_tif_district': 'tax_tif_district_num',
+}
+
+
+def district_code(value):
+    """Normalize a stored district code; the TIF district number is a float column"""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def pop_district_names(property_data):
+    """
+    Remove the district name columns from converted import data, returning
+    them as {(kind, code): name}
+    """
+    names = {}
+    for kind, code_field in DISTRICT_CODE_FIELDS.items():
+        name = property_data.pop(f'{kind}_name', None)
+        code = district_code(property_data.get(code_field))
+        if code is not None and name is not None:
+            names[(kind, code)] = name
+    return names
+
+
+def sync_districts(names):
+    """Insert or rename District rows from {(kind, code): name}"""
+    District.objects.bulk_create(
+        [District(kind=kind, code=code, name=name) for (kind, code), name in names.items()],
+        update_conflicts=True,
+        unique_fields=['kind', 'code'],
+        update_fields=['name'],
+    )
+
+
+# Per-worker copy of the dimension: (dataset version, {(kind, code): name})
+_district_names = (None, {})
+
+
+def get_district_names():
+    """
+    Return every district name keyed by (kind, code). The table is small and
+    only changes on import, so each worker loads it once per dataset version.
+    """
+    global _district_names
+    version = get_dataset_version().version
+    loaded_version, names = _district_names
+    if loaded_version != version:
+        names = {
+            (kind, code): name
+            for kind, code, name in District.objects.values_list('kind', 'code', 'name')
+        }
+        _district_names = (version, names)
+    return names
+
+
+def district_name(kind, code):
+    return get_district_names().get((kind, district_code(code)))
@@ -0,0 +1,111 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from .models import Property, PropertySnapshot
+
+
+# Columns that are identity or bookkeeping rather than yearly property data
+SNAPSHOT_EXCLUDED_FIELDS = {'id', 'pin', 'year', 'row_id', 'content_hash', 'created_at', 'updated_at'}
+
+SNAPSHOT_FIELDS = [
+    field.name for field in Property._meta.concrete_fields
+    if field.name not in SNAPSHOT_EXCLUDED_FIELDS
+]
+
+
+def _json_value(value):
+    """Values as they come back out of the JSON column, so diffs compare like with like"""
+    return str(value) if isinstance(value, Decimal) else value
+
+
+def _diff(prior, state):
+    return {name: value for name, value in state.items() if name not in prior or prior[name] != value}
+
+
+def record_property_snapshots(batch_size=1000):
+    """
+    Store the current year of every property as a delta against its prior
+    year. Re-importing a year replaces that year's snapshot, and the
+    following years are re-diffed so their deltas stay consistent. Only
+    rows whose delta changed are written. Returns the number of rows written.
+
+    Properties are processed batch_size PINs at a time, so memory does not
+    grow with the number of properties.
+    """
+    rows = Property.objects.order_by().values('pin', 'year', *SNAPSHOT_FIELDS).iterator(chunk_size=batch_size)
+    written = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            written += _record_snapshot_batch(batch)
+            batch = []
+    return written + _record_snapshot_batch(batch)
+
+
+def _record_snapshot_batch(rows):
+    if not rows:
+        return 0
+
+    # Full state per (pin, year), folded from the stored deltas
+    states = defaultdict(dict)
+    stored = {}
+    running = {}
+    snapshots = PropertySnapshot.objects.filter(pin__in=[row['pin'] for row in rows]) \
+                                        .order_by('pin', 'year') \
+                                        .values_list('pin', 'year', 'changes')
+    for pin, year, changes in snapshots:
+        running[pin] = {**running.get(pin, {}), **changes}
+        states[pin][year] = running[pin]
+        stored[(pin, year)] = changes
+
+    for row in rows:
+        pin, year = row.pop('pin'), row.pop('year')
+        states[pin][year] = {name: _json_value(value) for name, value in row.items()}
+
+    pending = []
+    for pin, years in states.items():
+        prior = {}
+        for year in sorted(years):
+            changes = _diff(prior, years[year])
+            if stored.get((pin, year)) != changes:
+                pending.append(PropertySnapshot(pin=pin, year=year, changes=changes))
+            prior = years[year]
+
+    PropertySnapshot.objects.bulk_create(
+        pending,
+        update_conflicts=True,
+        unique_fields=['pin', 'year'],
+        update_fields=['changes', 'recorded_at'],
+    )
+    return len(pending)
+
+
+def get_property_history(pin, fields=None):
+    """
+    Return [{'year', 'changes'}] for a PIN, oldest first, from a single range
+    scan of the (pin, year) index. ``fields`` limits the columns reported.
+    """
+    history = []
+    for year, changes in PropertySnapshot.objects.filter(pin=pin).values_list('year', 'changes'):
+        if fields is not None:
+            changes = {name: value for name, value in changes.items() if name in fields}
+        history.append({'year': year, 'changes': changes})
+    return history
+
+
+def get_property_as_of(pin, year, fields=None):
+    """
+    Return (snapshot year, values) for a PIN as of the given tax year, or
+    None if the PIN has no snapshot on or before it
+    """
+    snapshot_year = None
+    values = {}
+    snapshots = PropertySnapshot.objects.filter(pin=pin, year__lte=year).values_list('year', 'changes')
+    for snapshot_year, changes in snapshots:
+        values.update(changes)
+    if snapshot_year is None:
+        return None
+    if fields is not None:
+        values = {name: value for name, value in values.items() if name in fields}
+    return snapshot_year, values
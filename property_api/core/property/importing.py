@@ -0,0 +1,418 @@
+import hashlib
+import sys
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+import numpy as np
+import pandas as pd
+from django.db import connections
+from django.db.models.constants import OnConflict
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from .districts import pop_district_names
+from .models import Property
+from .routers import PRIMARY_DATABASE
+
+
+# Column converters. Each takes a whole CSV column and returns an object
+# Series of Python values, with None for missing values.
+
+def convert_str(column):
+    return column.astype(object).where(column.notna(), None)
+
+
+def convert_float(column):
+    column = pd.to_numeric(column, errors='coerce')
+    return column.astype(object).where(column.notna(), None)
+
+
+def convert_int(column):
+    column = np.trunc(pd.to_numeric(column, errors='coerce')).astype('Int64')
+    return column.astype(object).where(column.notna(), None)
+
+
+def convert_bool(column):
+    values = column.astype(str).str.lower().isin(['true', '1', 'yes'])
+    return values.astype(object).where(column.notna(), None)
+
+
+# Converters that coerce text to numbers. A cell that is present but does
+# not parse makes its row an error, as float()/int() did row by row.
+NUMERIC_CONVERTERS = (convert_float, convert_int)
+
+
+# Property field -> (county CSV column, converter)
+COUNTY_CSV_COLUMNS = {
+    'pin': ('pin', convert_str),
+    'pin10': ('pin10', convert_str),
+    'year': ('year', convert_int),
+    'class_code': ('class', convert_str),
+    'row_id': ('row_id', convert_str),
+    'longitude': ('lon', convert_float),
+    'latitude': ('lat', convert_float),
+    'x_3435': ('x_3435', convert_float),
+    'y_3435': ('y_3435', convert_float),
+    'zip_code': ('zip_code', convert_str),
+    'triad_name': ('triad_name', convert_str),
+    'triad_code': ('triad_code', convert_int),
+    'township_name': ('township_name', convert_str),
+    'township_code': ('township_code', convert_int),
+    'nbhd_code': ('nbhd_code', convert_str),
+    'tax_code': ('tax_code', convert_str),
+    'census_block_group_geoid': ('census_block_group_geoid', convert_str),
+    'census_block_geoid': ('census_block_geoid', convert_str),
+    'census_congressional_district_geoid': ('census_congressional_district_geoid', convert_str),
+    'census_congressional_district_num': ('census_congressional_district_num', convert_int),
+    'census_tract_geoid': ('census_tract_geoid', convert_str),
+    'census_data_year': ('census_data_year', convert_int),
+    'ward_num': ('ward_num', convert_int),
+    'ward_chicago_data_year': ('ward_chicago_data_year', convert_int),
+    'chicago_community_area_num': ('chicago_community_area_num', convert_int),
+    'chicago_community_area_name': ('chicago_community_area_name', convert_str),
+    'chicago_police_district_num': ('chicago_police_district_num', convert_int),
+    'school_elementary_district_geoid': ('school_elementary_district_geoid', convert_str),
+    'school_elementary_district_name': ('school_elementary_district_name', convert_str),
+    'school_secondary_district_geoid': ('school_secondary_district_geoid', convert_str),
+    'school_secondary_district_name': ('school_secondary_district_name', convert_str),
+    'school_unified_district_geoid': ('school_unified_district_geoid', convert_str),
+    'school_unified_district_name': ('school_unified_district_name', convert_str),
+    'school_school_year': ('school_school_year', convert_str),
+    'school_data_year': ('school_data_year', convert_int),
+    'tax_municipality_num': ('tax_municipality_num', convert_str),
+    'tax_municipality_name': ('tax_municipality_name', convert_str),
+    'tax_school_elementary_district_num': ('tax_school_elementary_district_num', convert_str),
+    'tax_school_elementary_district_name': ('tax_school_elementary_district_name', convert_str),
+    'tax_school_secondary_district_num': ('tax_school_secondary_district_num', convert_str),
+    'tax_school_secondary_district_name': ('tax_school_secondary_district_name', convert_str),
+    'tax_community_college_district_num': ('tax_community_college_district_num', convert_str),
+    'tax_community_college_district_name': ('tax_community_college_district_name', convert_str),
+    'tax_fire_protection_district_num': ('tax_fire_protection_district_num', convert_str),
+    'tax_fire_protection_district_name': ('tax_fire_protection_district_name', convert_str),
+    'tax_library_district_num': ('tax_library_district_num', convert_str),
+    'tax_library_district_name': ('tax_library_district_name', convert_str),
+    'tax_park_district_num': ('tax_park_district_num', convert_str),
+    'tax_park_district_name': ('tax_park_district_name', convert_str),
+    'tax_tif_district_num': ('tax_tif_district_num', convert_float),
+    'tax_tif_district_name': ('tax_tif_district_name', convert_str),
+    'tax_data_year': ('tax_data_year', convert_int),
+    'env_flood_fema_sfha': ('env_flood_fema_sfha', convert_bool),
+    'env_flood_fema_data_year': ('env_flood_fema_data_year', convert_int),
+    'env_flood_fs_factor': ('env_flood_fs_factor', convert_float),
+    'env_flood_fs_risk_direction': ('env_flood_fs_risk_direction', convert_str),
+    'env_ohare_noise_contour_no_buffer_bool': ('env_ohare_noise_contour_no_buffer_bool', convert_bool),
+    'env_ohare_noise_contour_half_mile_buffer_bool': ('env_ohare_noise_contour_half_mile_buffer_bool', convert_bool),
+    'env_airport_noise_dnl': ('env_airport_noise_dnl', convert_float),
+    'econ_enterprise_zone_num': ('econ_enterprise_zone_num', convert_str),
+    'econ_qualified_opportunity_zone_num': ('econ_qualified_opportunity_zone_num', convert_str),
+    'access_cmap_walk_id': ('access_cmap_walk_id', convert_int),
+    'access_cmap_walk_nta_score': ('access_cmap_walk_nta_score', convert_float),
+    'access_cmap_walk_total_score': ('access_cmap_walk_total_score', convert_float),
+    'access_cmap_walk_data_year': ('access_cmap_walk_data_year', convert_int),
+    'misc_subdivision_id': ('misc_subdivision_id', convert_str),
+    'misc_subdivision_data_year': ('misc_subdivision_data_year', convert_float),
+}
+
+
+def read_csv_options(columns):
+    """
+    read_csv arguments that load only the mapped columns, as text. The
+    converters do the numeric parsing, so a bad cell fails only its row.
+    """
+    csv_columns = [csv_column for csv_column, _ in columns.values()]
+    return {'usecols': csv_columns, 'dtype': dict.fromkeys(csv_columns, str)}
+
+
+def convert_frame(frame, columns):
+    """
+    Convert a raw CSV frame column by column into a frame keyed by model
+    field, holding Python values with None for missing ones.
+
+    Returns (frame, errors). Rows with a numeric cell that does not parse
+    are left out and reported once each as (row number, message).
+    """
+    converted = {}
+    errors = {}
+    for field, (csv_column, converter) in columns.items():
+        column = frame[csv_column]
+        values = converter(column)
+        if converter in NUMERIC_CONVERTERS:
+            for row_number in column.index[column.notna() & values.isna()]:
+                errors.setdefault(row_number, f'Invalid {csv_column} value: {column[row_number]!r}')
+        converted[field] = values
+
+    converted = pd.DataFrame(converted, index=frame.index)
+    if errors:
+        converted = converted.drop(index=list(errors))
+    return converted, list(errors.items())
+
+
+def iter_records(frame):
+    """Yield one {field: value} dict per converted row"""
+    fields = list(frame.columns)
+    # Zipping column lists is several times faster than itertuples() on object columns
+    columns = [frame[field].tolist() for field in fields]
+    for values in zip(*columns):
+        yield dict(zip(fields, values))
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB, or None where it cannot be read"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def map_chunks(function, chunks, workers=1):
+    """
+    Yield function(chunk) for each chunk, in order.
+
+    With more than one worker the calls run in a process pool. At most two
+    chunks per worker are in flight, so memory stays bounded however far
+    the pool gets ahead of the caller. The functions only parse and convert
+    data; they never touch the database, which stays with the caller.
+    """
+    if workers <= 1:
+        yield from map(function, chunks)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(function, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# Property columns written by insert_property_rows, in row order
+PROPERTY_INSERT_FIELDS = [field for field in Property._meta.concrete_fields if field is not Property._meta.auto_field]
+PIN_POSITION = PROPERTY_INSERT_FIELDS.index(Property._meta.get_field('pin'))
+CONTENT_HASH_POSITION = PROPERTY_INSERT_FIELDS.index(Property._meta.get_field('content_hash'))
+
+# Columns a county delta import overwrites: those the county CSV provides,
+# so the SSA 32 columns of a merged property survive it
+COUNTY_UPDATE_FIELDS = [
+    field.name for field in PROPERTY_INSERT_FIELDS
+    if (field.name in COUNTY_CSV_COLUMNS and field.name != 'pin') or field.name in ('content_hash', 'updated_at')
+]
+
+
+def content_hash(property_data):
+    """Hash of a converted CSV row, stable across runs for unchanged rows"""
+    return hashlib.blake2b(repr(tuple(property_data.items())).encode(), digest_size=16).hexdigest()
+
+
+def prepare_county_chunk(frame):
+    """
+    Convert a chunk of the county CSV into database-ready Property rows.
+
+    Doing Django's per-value preparation here rather than in bulk_create
+    lets it run in the worker processes. Returns (rows, district names,
+    errors), errors being (row number, message) pairs.
+    """
+    records, errors = convert_frame(frame, COUNTY_CSV_COLUMNS)
+    rows = []
+    district_names = {}
+    for row_number, property_data in zip(records.index, iter_records(records)):
+        try:
+            row_hash = content_hash(property_data)
+            district_names.update(pop_district_names(property_data))
+            rows.append(prepare_property_row(Property(content_hash=row_hash, **property_data)))
+        except Exception as e:
+            errors.append((row_number, str(e)))
+    return rows, district_names, errors
+
+
+def prepare_property_row(property_obj):
+    """A new Property as the database-ready tuple insert_property_rows writes"""
+    connection = connections[PRIMARY_DATABASE]
+    return tuple(
+        field.get_db_prep_save(field.pre_save(property_obj, True), connection=connection)
+        for field in PROPERTY_INSERT_FIELDS
+    )
+
+
+def insert_property_rows(rows, update_fields=None, using=PRIMARY_DATABASE):
+    """
+    Insert rows from prepare_property_row. PINs that already exist are
+    skipped, as bulk_create(ignore_conflicts=True) would, or when
+    update_fields is given have those fields overwritten in place.
+    """
+    connection = connections[using]
+    ops = connection.ops
+    fields = PROPERTY_INSERT_FIELDS
+    columns = ', '.join(ops.quote_name(field.column) for field in fields)
+    placeholder = '(%s)' % ', '.join(['%s'] * len(fields))
+    batch_size = max(ops.bulk_batch_size(fields, rows), 1)
+    if update_fields:
+        on_conflict = OnConflict.UPDATE
+        update_columns = [Property._meta.get_field(name).column for name in update_fields]
+        conflict_sql = ops.on_conflict_suffix_sql(fields, on_conflict, update_columns, ['pin'])
+    else:
+        on_conflict = OnConflict.IGNORE
+        conflict_sql = ops.on_conflict_suffix_sql(fields, on_conflict, None, None)
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            cursor.execute(
+                f'{ops.insert_statement(on_conflict=on_conflict)} '
+                f'{ops.quote_name(Property._meta.db_table)} ({columns}) '
+                f'VALUES {", ".join([placeholder] * len(batch))} '
+                f'{conflict_sql}',
+                [value for row in batch for value in row],
+            )
+
+
+def stored_content_hashes(pins, batch_size=1000):
+    """{pin: content hash} of the given PINs that exist"""
+    hashes = {}
+    for start in range(0, len(pins), batch_size):
+        hashes.update(
+            Property.objects.filter(pin__in=pins[start:start + batch_size]).values_list('pin', 'content_hash')
+        )
+    return hashes
+
+
+# SSA 32 CSV
+
+def convert_ssa32_chunk(frame):
+    """
+    Convert a chunk of the SSA 32 CSV. Returns (records, errors): records
+    are (row number, property data) pairs, errors are (row number,
+    message, row, traceback) tuples.
+    """
+    records = []
+    errors = []
+    for row_number, row in zip(frame.index, frame.to_dict('records')):
+        try:
+            records.append((row_number, ssa32_property_data(row)))
+        except Exception as e:
+            errors.append((row_number, str(e), row, traceback.format_exc()))
+    return records, errors
+
+
+def ssa32_property_data(row):
+    """Convert an SSA 32 CSV row to Property model data"""
+
+    # Clean and normalize data
+    pin = normalize_pin(row['pin'])
+    pin10 = generate_pin10(pin)
+
+    return {
+        # Primary identifiers
+        'pin': pin,
+        'pin10': pin10,
+        'year': int(row['tax_year']) if pd.notna(row['tax_year']) else 2023,
+        'class_code': str(row['class']) if pd.notna(row['class']) else '',
+        'row_id': generate_row_id(row),
+
+        # Location data
+        'longitude': float(row['longitude']) if pd.notna(row['longitude']) else 0.0,
+        'latitude': float(row['latitude']) if pd.notna(row['latitude']) else 0.0,
+        'zip_code': clean_zip_code(row['property_zip']),
+
+        # SSA 32 Property Information
+        'property_address': str(row['property_address']) if pd.notna(row['property_address']) else None,
+        'property_city': str(row['property_city']) if pd.notna(row['property_city']) else None,
+        'property_state': str(row['property_state']) if pd.notna(row['property_state']) else None,
+        'square_footage_land': clean_square_footage(row['square_footage_land']),
+
+        # Assessment Information
+        'total_assessed_value': clean_currency(row['total_assessed_value']),
+        'land_assessed_value': clean_currency(row['land_assessed_value']),
+        'building_assessed_value': clean_currency(row['building_assessed_value']),
+
+        # Property Status
+        'vacancy_type': str(row['vacancy_type']) if pd.notna(row['vacancy_type']) else None,
+        'assessor_office_link': str(row['assessor_office_link']) if pd.notna(row['assessor_office_link']) else None,
+
+        # Taxpayer Information
+        'taxpayer_id': str(row['taxpayer_id']) if pd.notna(row['taxpayer_id']) else None,
+        'mailing_name': str(row['mailing_name']) if pd.notna(row['mailing_name']) else None,
+        'mailing_address': str(row['mailing_address']) if pd.notna(row['mailing_address']) else None,
+        'mailing_city': str(row['mailing_city']) if pd.notna(row['mailing_city']) else None,
+        'mailing_state': str(row['mailing_state']) if pd.notna(row['mailing_state']) else None,
+        'mailing_zip': clean_zip_code(row['mailing_zip']),
+
+        # Administrative divisions (default values for SSA 32)
+        'triad_name': 'South',
+        'triad_code': 3,
+        'township_name': 'South Chicago',
+        'township_code': 77,
+        'nbhd_code': '72225',  # Default neighborhood code
+        'tax_code': str(row['tax_district_code']) if pd.notna(row['tax_district_code']) else '',
+
+        # Chicago specific data
+        'ward_num': int(row['ward_number']) if pd.notna(row['ward_number']) else None,
+    }
+
+
+def clean_currency(value):
+    """Clean currency values and convert to decimal"""
+    if pd.isna(value):
+        return None
+
+    # Convert to string and remove currency symbols and commas
+    str_val = str(value).replace('$', '').replace(',', '').strip()
+
+    try:
+        return float(str_val)
+    except (ValueError, TypeError):
+        return None
+
+
+def clean_square_footage(value):
+    """Clean square footage values"""
+    if pd.isna(value):
+        return None
+
+    try:
+        return int(float(value))
+    except (ValueError, TypeError):
+        return None
+
+
+def clean_zip_code(value):
+    """Clean ZIP code to remove decimal points like '60620.0' -> '60620'"""
+    if pd.isna(value):
+        return None
+    str_val = str(value).strip()
+    # Remove decimal point and anything after it
+    if '.' in str_val:
+        str_val = str_val.split('.')[0]
+    return str_val
+
+
+def normalize_pin(pin_value):
+    """Normalize PIN format"""
+    if pd.isna(pin_value):
+        return ''
+
+    pin_str = str(pin_value).strip()
+    # Remove any non-numeric characters except hyphens
+    pin_str = ''.join(c for c in pin_str if c.isdigit() or c == '-')
+    return pin_str
+
+
+def generate_pin10(pin):
+    """Generate 10-digit PIN from full PIN"""
+    # Remove hyphens and take first 10 digits
+    pin_digits = ''.join(c for c in pin if c.isdigit())
+    return pin_digits[:10] if len(pin_digits) >= 10 else pin_digits
+
+
+def generate_row_id(row):
+    """Generate a unique row ID"""
+    pin = normalize_pin(row['pin'])
+    year = int(row['tax_year']) if pd.notna(row['tax_year']) else 2023
+    return f"{pin}_{year}"
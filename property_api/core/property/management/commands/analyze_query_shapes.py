@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.property.models import Property
+from core.property.query_shapes import get_query_shapes, propose_index, reset_query_shapes
+
+
+class Command(BaseCommand):
+    help = 'Report the filter combinations hitting the properties table and propose indexes for them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-count',
+            type=int,
+            default=10,
+            help='Only propose indexes for shapes seen at least this many times'
+        )
+        parser.add_argument(
+            '--apply',
+            action='store_true',
+            help='Create the proposed indexes in the database'
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Clear the recorded query shapes afterwards'
+        )
+
+    def handle(self, *args, **options):
+        shapes = get_query_shapes()
+        if not shapes:
+            self.stdout.write('No query shapes recorded yet')
+            return
+
+        self.stdout.write(f'{"count":>8}  filters / ordering')
+        proposals = {}
+        for shape, count in shapes:
+            filters, ordering = shape
+            self.stdout.write(f'{count:>8}  {", ".join(filters) or "-"} / {", ".join(ordering)}')
+            if count >= options['min_count']:
+                index = propose_index(Property, shape)
+                if index is not None:
+                    proposals.setdefault(index.name, index)
+
+        if not proposals:
+            self.stdout.write(self.style.SUCCESS('Existing indexes cover every frequent shape'))
+        else:
+            self.stdout.write('\nProposed indexes (add to Property.Meta.indexes):')
+            for index in proposals.values():
+                condition = ''
+                if index.condition:
+                    lookups = ', '.join(f'{lookup}={value!r}' for lookup, value in index.condition.children)
+                    condition = f', condition=models.Q({lookups})'
+                self.stdout.write(f'    models.Index(fields={index.fields!r}, name={index.name!r}{condition}),')
+
+        if options['apply'] and proposals:
+            with connection.cursor() as cursor:
+                existing = connection.introspection.get_constraints(cursor, Property._meta.db_table)
+            with connection.schema_editor() as schema_editor:
+                for index in proposals.values():
+                    if index.name in existing:
+                        self.stdout.write(f'{index.name} already exists')
+                        continue
+                    schema_editor.add_index(Property, index)
+                    self.stdout.write(self.style.SUCCESS(f'Created {index.name}'))
+            self.stdout.write(
+                self.style.WARNING('Add the created indexes to Property.Meta so migrations know about them')
+            )
+
+        if options['reset']:
+            reset_query_shapes()
+            self.stdout.write('Query shapes reset')
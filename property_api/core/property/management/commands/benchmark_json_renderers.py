@@ -0,0 +1,84 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from core.property.models import Property
+from core.property.serializers import (
+    PropertySummarySerializer, PropertyDetailSerializer, PropertyGeoJSONSerializer
+)
+from core.util.renderers import ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'Benchmark JSON encode time of full property pages for each renderer'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=100,
+            help='Number of properties per page (default: 100, the API maximum)'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=200,
+            help='Number of encodes per renderer and payload'
+        )
+
+    def handle(self, *args, **options):
+        page_size = options['page_size']
+        iterations = options['iterations']
+
+        properties = list(Property.objects.all()[:page_size])
+        if not properties:
+            raise CommandError('No properties found, import data before benchmarking')
+
+        # Serialize once up front so only the encode step is timed
+        payloads = {
+            'list page': {
+                'count': len(properties),
+                'results': PropertySummarySerializer(properties, many=True).data,
+            },
+            'detail page': {
+                'results': PropertyDetailSerializer(
+                    properties, many=True,
+                    context={'projection': self._detail_fields_without_counts()}
+                ).data,
+            },
+            'geojson': {
+                'type': 'FeatureCollection',
+                'features': [PropertyGeoJSONSerializer(prop).data for prop in properties],
+            },
+        }
+        renderers = {
+            'stdlib json': JSONRenderer(),
+            'orjson': ORJSONRenderer(),
+        }
+
+        self.stdout.write(
+            f'Encoding {len(properties)} properties, {iterations} iterations per payload'
+        )
+        for payload_name, payload in payloads.items():
+            timings = {}
+            for renderer_name, renderer in renderers.items():
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    content = renderer.render(payload)
+                elapsed = (time.perf_counter() - start) / iterations
+                timings[renderer_name] = elapsed
+                self.stdout.write(
+                    f'{payload_name:>12} | {renderer_name:<12} '
+                    f'{elapsed * 1000:8.3f} ms/encode  {len(content):>9} bytes'
+                )
+
+            speedup = timings['stdlib json'] / timings['orjson']
+            self.stdout.write(self.style.SUCCESS(f'{payload_name:>12} | orjson speedup: {speedup:.1f}x'))
+
+    def _detail_fields_without_counts(self):
+        """Detail fields minus nearby_properties_count, which would run a query per row"""
+        return [
+            name for name in PropertyDetailSerializer().fields
+            if name != 'nearby_properties_count'
+        ]
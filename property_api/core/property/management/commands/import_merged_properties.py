@@ -0,0 +1,197 @@
+import os
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from core.property.models import District, Property, PropertySearchIndex
+from core.property.dataset import announce_dataset_version, bump_dataset_version
+from core.property.districts import pop_district_names, sync_districts
+from core.property.history import record_property_snapshots
+from core.property.importing import (
+    PROPERTY_INSERT_FIELDS, insert_property_rows, iter_records, peak_rss_mb, prepare_property_row,
+)
+from core.property.merging import MERGE_SOURCE_READERS, merge_sources, pin_key
+from core.property.routers import primary_database
+from core.property.snapshot import publish_property_snapshot
+from core.property.statistics import refresh_property_statistics
+
+
+# A merged row is the whole truth for its PIN, so every column but the key is rewritten
+MERGE_UPDATE_FIELDS = [field.name for field in PROPERTY_INSERT_FIELDS if field.name not in ('pin', 'created_at')]
+
+
+class Command(BaseCommand):
+    help = 'Import the county, 79th Street corridor and SSA 32 CSVs merged on PIN in one pass'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source',
+            action='append',
+            default=[],
+            metavar='NAME=PATH',
+            help='Override the CSV path of a source in PROPERTY_MERGE_SOURCES (repeatable)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of merged properties written per batch'
+        )
+        parser.add_argument(
+            '--warm',
+            action='store_true',
+            help='Warm property caches after import'
+        )
+
+    def execute(self, *args, **options):
+        # Imports read back what they write, so never from the published snapshot
+        with primary_database():
+            return super().execute(*args, **options)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        sources = self._source_paths(options['source'])
+
+        frames = {}
+        error_count = 0
+        for name, path in sources.items():
+            self.stdout.write(f'Reading {name} data from: {path}')
+            frame, errors = MERGE_SOURCE_READERS[name](path)
+            for row_number, message, _, _ in errors:
+                self.stdout.write(self.style.WARNING(f'Error processing {name} row {row_number}: {message}'))
+            error_count += len(errors)
+            frames[name] = frame
+            self.stdout.write(f'Found {len(frame)} properties in {name} data')
+
+        self.stdout.write('Merging sources on PIN...')
+        merged = merge_sources(frames, settings.PROPERTY_MERGE_PRECEDENCE)
+        self.stdout.write(f'Merged into {len(merged)} properties')
+
+        municipalities = dict(
+            District.objects.filter(kind='tax_municipality').values_list('code', 'name')
+        )
+        district_names = {}
+
+        # One transaction, so readers never see a half-applied load
+        with transaction.atomic():
+            replaced_count = self._delete_unnormalized(set(merged.index), batch_size)
+            if replaced_count:
+                self.stdout.write(f'Replaced {replaced_count} properties stored under formatted PINs')
+
+            written_count = 0
+            for start in range(0, len(merged), batch_size):
+                rows = []
+                search_texts = {}
+                for property_data in iter_records(merged.iloc[start:start + batch_size]):
+                    try:
+                        names = pop_district_names(property_data)
+                        district_names.update(names)
+                        search_texts[property_data['pin']] = self._search_text(property_data, names, municipalities)
+                        rows.append(prepare_property_row(Property(**property_data)))
+                    except Exception as e:
+                        error_count += 1
+                        self.stdout.write(
+                            self.style.WARNING(f'Error processing PIN {property_data["pin"]}: {str(e)}')
+                        )
+
+                insert_property_rows(rows, update_fields=MERGE_UPDATE_FIELDS)
+                self._upsert_search_indices(search_texts)
+                written_count += len(rows)
+                self.stdout.write(f'Wrote {written_count} merged properties')
+
+            self.stdout.write(f'Updating {len(district_names)} district names...')
+            sync_districts(district_names)
+
+        self.stdout.write('Recording property history...')
+        snapshot_count = record_property_snapshots()
+        self.stdout.write(f'Wrote {snapshot_count} yearly snapshots')
+
+        publish_snapshot = bool(settings.PROPERTY_SNAPSHOT_PATH)
+        # Readers must not cache the new version before its snapshot is live
+        dataset_version = bump_dataset_version(announce=not publish_snapshot)
+        self.stdout.write(f'Dataset version is now {dataset_version.version}')
+
+        self.stdout.write('Refreshing property statistics...')
+        refresh_property_statistics()
+
+        if publish_snapshot:
+            self.stdout.write('Publishing property snapshot...')
+            publish_property_snapshot()
+            announce_dataset_version(dataset_version)
+
+        if options['warm']:
+            call_command('warm_property_caches', stdout=self.stdout)
+
+        peak_rss = peak_rss_mb()
+        if peak_rss is not None:
+            self.stdout.write(f'Peak memory: {peak_rss:.0f} MiB')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Merge completed! Properties: {written_count}, Errors: {error_count}')
+        )
+
+    def _source_paths(self, overrides):
+        """PROPERTY_MERGE_SOURCES with --source overrides, resolved against the repository root"""
+        sources = dict(settings.PROPERTY_MERGE_SOURCES)
+        for override in overrides:
+            name, separator, path = override.partition('=')
+            if not separator:
+                raise CommandError(f'--source expects NAME=PATH, got {override!r}')
+            sources[name] = path
+
+        repository_root = os.path.join(settings.BASE_DIR, '..')
+        paths = {}
+        for name, path in sources.items():
+            if name not in MERGE_SOURCE_READERS:
+                raise CommandError(
+                    f'Unknown merge source {name!r}; expected one of {", ".join(MERGE_SOURCE_READERS)}'
+                )
+            path = path if os.path.isabs(path) else os.path.join(repository_root, path)
+            if not os.path.exists(path):
+                raise CommandError(f'CSV file not found: {path}')
+            paths[name] = path
+        return paths
+
+    def _delete_unnormalized(self, pins, batch_size):
+        """
+        Delete properties stored under a formatted PIN (as import_ssa32_data
+        stores them) whose normalized PIN is being written
+        """
+        superseded = [
+            pin for pin in Property.objects.values_list('pin', flat=True).iterator(chunk_size=5000)
+            if pin != pin_key(pin) and pin_key(pin) in pins
+        ]
+        for start in range(0, len(superseded), batch_size):
+            Property.objects.filter(pin__in=superseded[start:start + batch_size]).delete()
+        return len(superseded)
+
+    def _search_text(self, property_data, district_names, municipalities):
+        """Searchable text covering both the county and the SSA 32 columns"""
+        municipality = district_names.get(('tax_municipality', property_data.get('tax_municipality_num')))
+        search_parts = [
+            property_data['pin'],
+            property_data.get('pin10'),
+            property_data.get('property_address'),
+            property_data.get('property_city'),
+            property_data.get('chicago_community_area_name'),
+            property_data.get('zip_code'),
+            property_data.get('township_name'),
+            municipality or municipalities.get(property_data.get('tax_municipality_num')),
+            property_data.get('mailing_name'),
+            property_data.get('class_code'),
+            property_data.get('vacancy_type'),
+            str(property_data.get('ward_num') or ''),
+        ]
+        return ' '.join(str(part) for part in search_parts if part)
+
+    def _upsert_search_indices(self, search_texts):
+        property_ids = Property.objects.filter(pin__in=list(search_texts)).values_list('pin', 'id')
+        PropertySearchIndex.objects.bulk_create(
+            [
+                PropertySearchIndex(property_id=property_id, search_text=search_texts[pin])
+                for pin, property_id in property_ids
+            ],
+            update_conflicts=True,
+            unique_fields=['property'],
+            update_fields=['search_text'],
+        )
@@ -1,8 +1,21 @@
 import pandas as pd
 import os
+from contextlib import nullcontext
+from django.core.management import call_command
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
-from core.property.models import Property, PropertySearchIndex
+from django.db import transaction
+from core.property.models import District, Property, PropertyChange, PropertySearchIndex
+from core.property.dataset import announce_dataset_version, bump_dataset_version
+from core.property.history import record_property_snapshots
+from core.property.importing import (
+    CONTENT_HASH_POSITION, COUNTY_CSV_COLUMNS, COUNTY_UPDATE_FIELDS, PIN_POSITION, insert_property_rows,
+    map_chunks, peak_rss_mb, prepare_county_chunk, read_csv_options, stored_content_hashes,
+)
+from core.property.routers import primary_database
+from core.property.snapshot import publish_property_snapshot
+from core.property.districts import sync_districts
+from core.property.statistics import refresh_property_statistics
 
 
 class Command(BaseCommand):
@@ -21,16 +34,47 @@ class Command(BaseCommand):
             default=50,
             help='Number of records to process in each batch'
         )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.PROPERTY_IMPORT_CHUNK_SIZE,
+            help='Number of CSV rows read and converted at a time'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Processes that convert CSV chunks in parallel while this one writes them'
+        )
         parser.add_argument(
             '--clear',
             action='store_true',
             help='Clear existing data before import'
         )
+        parser.add_argument(
+            '--delta',
+            action='store_true',
+            help='Only insert, update or delete the properties whose CSV row changed, logging each change'
+        )
+        parser.add_argument(
+            '--warm',
+            action='store_true',
+            help='Warm property caches after import'
+        )
+
+    def execute(self, *args, **options):
+        # Imports read back what they write, so never from the published snapshot
+        with primary_database():
+            return super().execute(*args, **options)
 
     def handle(self, *args, **options):
         csv_path = options['csv_path']
         batch_size = options['batch_size']
         clear_data = options['clear']
+        delta = options['delta']
+
+        if delta and clear_data:
+            raise CommandError('--delta compares against the existing data, so it cannot be combined with --clear')
 
         # Resolve CSV path relative to project root
         if not os.path.isabs(csv_path):
@@ -49,148 +93,186 @@ class Command(BaseCommand):
             PropertySearchIndex.objects.all().delete()
 
         try:
-            # Read CSV file
+            # Stream the CSV so memory stays bounded by the chunk size, not the file size
             self.stdout.write('Reading CSV file...')
-            df = pd.read_csv(csv_path)
-            total_rows = len(df)
-            self.stdout.write(f'Found {total_rows} records in CSV file')
+            chunks = pd.read_csv(csv_path, chunksize=options['chunk_size'], **read_csv_options(COUNTY_CSV_COLUMNS))
 
             # Process data in batches
             created_count = 0
             error_count = 0
+            district_names = {}
+            row_count = 0
+            # Delta mode: every PIN in the file, and the PINs it created or updated
+            seen_pins = set()
+            created_pins = []
+            updated_pins = []
 
-            for i in range(0, total_rows, batch_size):
-                batch_df = df.iloc[i:i+batch_size]
-                batch_properties = []
-
-                for _, row in batch_df.iterrows():
-                    try:
-                        # Convert pandas types to Python types and handle NaN
-                        property_data = self._convert_row_to_property_data(row)
-                        property_obj = Property(**property_data)
-                        batch_properties.append(property_obj)
-                    except Exception as e:
+            # A delta is applied as a whole, or a failed run would leave rows that
+            # the next run sees as unchanged without their search index refreshed
+            with transaction.atomic() if delta else nullcontext():
+                # Chunks are converted by the workers and written here, in file order
+                for rows, chunk_district_names, errors in map_chunks(prepare_county_chunk, chunks, options['workers']):
+                    district_names.update(chunk_district_names)
+                    for row_number, message in errors:
                         error_count += 1
                         self.stdout.write(
-                            self.style.WARNING(f'Error processing row {i}: {str(e)}')
+                            self.style.WARNING(f'Error processing row {row_number}: {message}')
                         )
 
-                # Bulk create properties
-                if batch_properties:
-                    try:
-                        Property.objects.bulk_create(batch_properties, ignore_conflicts=True)
-                        created_count += len(batch_properties)
-                        self.stdout.write(f'Processed batch {i//batch_size + 1}: {len(batch_properties)} records')
-                    except Exception as e:
-                        error_count += len(batch_properties)
-                        self.stdout.write(
-                            self.style.ERROR(f'Error creating batch: {str(e)}')
-                        )
+                    row_count += len(rows) + len(errors)
+                    if delta:
+                        created, updated = self._write_delta(rows, seen_pins, batch_size)
+                        created_pins.extend(created)
+                        updated_pins.extend(updated)
+                        created_count += len(created)
+                    else:
+                        for i in range(0, len(rows), batch_size):
+                            batch_rows = rows[i:i+batch_size]
+                            try:
+                                insert_property_rows(batch_rows)
+                                created_count += len(batch_rows)
+                            except Exception as e:
+                                error_count += len(batch_rows)
+                                self.stdout.write(
+                                    self.style.ERROR(f'Error creating batch: {str(e)}')
+                                )
+
+                    self.stdout.write(f'Processed {row_count} records')
+
+                self.stdout.write(f'Updating {len(district_names)} district names...')
+                sync_districts(district_names)
+
+                deleted_count = 0
+                if delta:
+                    if error_count:
+                        # A row that failed to convert would look deleted
+                        self.stdout.write(self.style.WARNING('Skipping deletions because some rows failed'))
+                    else:
+                        deleted_count = self._delete_missing(seen_pins, batch_size)
+
+                # Create search indices
+                self.stdout.write('Creating search indices...')
+                self._create_search_indices(created_pins + updated_pins if delta else None)
 
-            # Create search indices
-            self.stdout.write('Creating search indices...')
-            self._create_search_indices()
+                self.stdout.write('Recording property history...')
+                snapshot_count = record_property_snapshots()
+                self.stdout.write(f'Wrote {snapshot_count} yearly snapshots')
 
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f'Import completed! Created: {created_count}, Errors: {error_count}'
+                # The change log is stamped in the same transaction as the bump, so a
+                # crash cannot leave unstamped rows for the next import to claim
+                dataset_version = bump_dataset_version(announce=False)
+                self.stdout.write(f'Dataset version is now {dataset_version.version}')
+                if delta:
+                    PropertyChange.objects.filter(dataset_version__isnull=True) \
+                                          .update(dataset_version=dataset_version.version)
+
+                publish_snapshot = bool(settings.PROPERTY_SNAPSHOT_PATH)
+                if not publish_snapshot:
+                    # Readers must not cache a version that could still roll back
+                    transaction.on_commit(lambda: announce_dataset_version(dataset_version))
+
+            self.stdout.write('Refreshing property statistics...')
+            refresh_property_statistics()
+
+            if publish_snapshot:
+                self.stdout.write('Publishing property snapshot...')
+                publish_property_snapshot()
+                announce_dataset_version(dataset_version)
+
+            if options['warm']:
+                call_command('warm_property_caches', stdout=self.stdout)
+
+            peak_rss = peak_rss_mb()
+            if peak_rss is not None:
+                self.stdout.write(f'Peak memory: {peak_rss:.0f} MiB')
+
+            if delta:
+                summary = (
+                    f'Created: {created_count}, Updated: {len(updated_pins)}, '
+                    f'Deleted: {deleted_count}, Unchanged: {len(seen_pins) - created_count - len(updated_pins)}, '
+                    f'Errors: {error_count}'
                 )
-            )
+            else:
+                summary = f'Created: {created_count}, Errors: {error_count}'
+            self.stdout.write(self.style.SUCCESS(f'Import completed! {summary}'))
 
         except Exception as e:
             raise CommandError(f'Error processing CSV file: {str(e)}')
 
-    def _convert_row_to_property_data(self, row):
-        """Convert pandas row to Property model data, handling NaN values"""
-        
-        def safe_float(value):
-            return None if pd.isna(value) else float(value)
-        
-        def safe_int(value):
-            return None if pd.isna(value) else int(value)
-        
-        def safe_str(value):
-            return None if pd.isna(value) else str(value)
-        
-        def safe_bool(value):
-            if pd.isna(value):
-                return None
-            return bool(value) if isinstance(value, bool) else str(value).lower() in ['true', '1', 'yes']
-
-        return {
-            'pin': safe_str(row['pin']),
-            'pin10': safe_str(row['pin10']),
-            'year': safe_int(row['year']),
-            'class_code': safe_str(row['class']),
-            'row_id': safe_str(row['row_id']),
-            'longitude': safe_float(row['lon']),
-            'latitude': safe_float(row['lat']),
-            'x_3435': safe_float(row['x_3435']),
-            'y_3435': safe_float(row['y_3435']),
-            'zip_code': safe_str(row['zip_code']),
-            'triad_name': safe_str(row['triad_name']),
-            'triad_code': safe_int(row['triad_code']),
-            'township_name': safe_str(row['township_name']),
-            'township_code': safe_int(row['township_code']),
-            'nbhd_code': safe_str(row['nbhd_code']),
-            'tax_code': safe_str(row['tax_code']),
-            'census_block_group_geoid': safe_str(row['census_block_group_geoid']),
-            'census_block_geoid': safe_str(row['census_block_geoid']),
-            'census_congressional_district_geoid': safe_str(row['census_congressional_district_geoid']),
-            'census_congressional_district_num': safe_int(row['census_congressional_district_num']),
-            'census_tract_geoid': safe_str(row['census_tract_geoid']),
-            'census_data_year': safe_int(row['census_data_year']),
-            'ward_num': safe_int(row['ward_num']),
-            'ward_chicago_data_year': safe_int(row['ward_chicago_data_year']),
-            'chicago_community_area_num': safe_int(row['chicago_community_area_num']),
-            'chicago_community_area_name': safe_str(row['chicago_community_area_name']),
-            'chicago_police_district_num': safe_int(row['chicago_police_district_num']),
-            'school_elementary_district_geoid': safe_str(row['school_elementary_district_geoid']),
-            'school_elementary_district_name': safe_str(row['school_elementary_district_name']),
-            'school_secondary_district_geoid': safe_str(row['school_secondary_district_geoid']),
-            'school_secondary_district_name': safe_str(row['school_secondary_district_name']),
-            'school_unified_district_geoid': safe_str(row['school_unified_district_geoid']),
-            'school_unified_district_name': safe_str(row['school_unified_district_name']),
-            'school_school_year': safe_str(row['school_school_year']),
-            'school_data_year': safe_int(row['school_data_year']),
-            'tax_municipality_num': safe_str(row['tax_municipality_num']),
-            'tax_municipality_name': safe_str(row['tax_municipality_name']),
-            'tax_school_elementary_district_num': safe_str(row['tax_school_elementary_district_num']),
-            'tax_school_elementary_district_name': safe_str(row['tax_school_elementary_district_name']),
-            'tax_school_secondary_district_num': safe_str(row['tax_school_secondary_district_num']),
-            'tax_school_secondary_district_name': safe_str(row['tax_school_secondary_district_name']),
-            'tax_community_college_district_num': safe_str(row['tax_community_college_district_num']),
-            'tax_community_college_district_name': safe_str(row['tax_community_college_district_name']),
-            'tax_fire_protection_district_num': safe_str(row['tax_fire_protection_district_num']),
-            'tax_fire_protection_district_name': safe_str(row['tax_fire_protection_district_name']),
-            'tax_library_district_num': safe_str(row['tax_library_district_num']),
-            'tax_library_district_name': safe_str(row['tax_library_district_name']),
-            'tax_park_district_num': safe_str(row['tax_park_district_num']),
-            'tax_park_district_name': safe_str(row['tax_park_district_name']),
-            'tax_tif_district_num': safe_float(row['tax_tif_district_num']),
-            'tax_tif_district_name': safe_str(row['tax_tif_district_name']),
-            'tax_data_year': safe_int(row['tax_data_year']),
-            'env_flood_fema_sfha': safe_bool(row['env_flood_fema_sfha']),
-            'env_flood_fema_data_year': safe_int(row['env_flood_fema_data_year']),
-            'env_flood_fs_factor': safe_float(row['env_flood_fs_factor']),
-            'env_flood_fs_risk_direction': safe_str(row['env_flood_fs_risk_direction']),
-            'env_ohare_noise_contour_no_buffer_bool': safe_bool(row['env_ohare_noise_contour_no_buffer_bool']),
-            'env_ohare_noise_contour_half_mile_buffer_bool': safe_bool(row['env_ohare_noise_contour_half_mile_buffer_bool']),
-            'env_airport_noise_dnl': safe_float(row['env_airport_noise_dnl']),
-            'econ_enterprise_zone_num': safe_str(row['econ_enterprise_zone_num']),
-            'econ_qualified_opportunity_zone_num': safe_str(row['econ_qualified_opportunity_zone_num']),
-            'access_cmap_walk_id': safe_int(row['access_cmap_walk_id']),
-            'access_cmap_walk_nta_score': safe_float(row['access_cmap_walk_nta_score']),
-            'access_cmap_walk_total_score': safe_float(row['access_cmap_walk_total_score']),
-            'access_cmap_walk_data_year': safe_int(row['access_cmap_walk_data_year']),
-            'misc_subdivision_id': safe_str(row['misc_subdivision_id']),
-            'misc_subdivision_data_year': safe_float(row['misc_subdivision_data_year']),
-        }
-
-    def _create_search_indices(self):
-        """Create search indices for existing properties"""
-        properties = Property.objects.all()
+    def _write_delta(self, rows, seen_pins, batch_size):
+        """
+        Insert the rows whose PIN is new and update the rows whose content
+        hash changed, logging each. Returns (created PINs, updated PINs).
+        """
+        # The first row for a PIN wins, as in a full import
+        fresh = {}
+        for row in rows:
+            pin = row[PIN_POSITION]
+            if pin not in seen_pins:
+                seen_pins.add(pin)
+                fresh[pin] = row
+
+        stored = stored_content_hashes(list(fresh))
+        created = [row for pin, row in fresh.items() if pin not in stored]
+        # Rows imported before hashes were stored have none, so they update once
+        updated = [
+            row for pin, row in fresh.items()
+            if pin in stored and stored[pin] != row[CONTENT_HASH_POSITION]
+        ]
+
+        for i in range(0, len(created), batch_size):
+            insert_property_rows(created[i:i+batch_size])
+        for i in range(0, len(updated), batch_size):
+            insert_property_rows(updated[i:i+batch_size], update_fields=COUNTY_UPDATE_FIELDS)
+
+        created_pins = [row[PIN_POSITION] for row in created]
+        updated_pins = [row[PIN_POSITION] for row in updated]
+        PropertyChange.objects.bulk_create(
+            [PropertyChange(pin=pin, action=PropertyChange.CREATED) for pin in created_pins]
+            + [PropertyChange(pin=pin, action=PropertyChange.UPDATED) for pin in updated_pins],
+            batch_size=batch_size,
+        )
+        return created_pins, updated_pins
+
+    def _delete_missing(self, seen_pins, batch_size):
+        """
+        Delete county properties whose PIN is no longer in the file, logging
+        each. Properties without a content hash did not come from a delta
+        import of this file (SSA 32 rows, say), so they are left alone.
+        """
+        missing = [
+            pin for pin in Property.objects.filter(content_hash__isnull=False)
+                                           .values_list('pin', flat=True)
+                                           .iterator(chunk_size=5000)
+            if pin not in seen_pins
+        ]
+        for i in range(0, len(missing), batch_size):
+            Property.objects.filter(pin__in=missing[i:i+batch_size]).delete()
+        PropertyChange.objects.bulk_create(
+            [PropertyChange(pin=pin, action=PropertyChange.DELETED) for pin in missing],
+            batch_size=batch_size,
+        )
+        return len(missing)
+
+    def _create_search_indices(self, pins=None, batch_size=5000):
+        """Create or refresh search indices for the given PINs, or for every property"""
+        queryset = Property.objects.only(
+            'id', 'pin', 'pin10', 'chicago_community_area_name', 'zip_code',
+            'township_name', 'tax_municipality_num',
+        )
+        if pins is None:
+            properties = queryset.iterator(chunk_size=batch_size)
+        else:
+            properties = (
+                prop
+                for i in range(0, len(pins), batch_size)
+                for prop in queryset.filter(pin__in=pins[i:i+batch_size])
+            )
         search_indices = []
+        created_count = 0
+        municipalities = dict(
+            District.objects.filter(kind='tax_municipality').values_list('code', 'name')
+        )
 
         for prop in properties:
             search_text_parts = []
@@ -206,8 +288,8 @@ class Command(BaseCommand):
                 search_text_parts.append(prop.zip_code)
             if prop.township_name:
                 search_text_parts.append(prop.township_name)
-            if prop.tax_municipality_name:
-                search_text_parts.append(prop.tax_municipality_name)
+            if prop.tax_municipality_num in municipalities:
+                search_text_parts.append(municipalities[prop.tax_municipality_num])
 
             search_text = ' '.join(search_text_parts)
             
@@ -217,6 +299,20 @@ class Command(BaseCommand):
             )
             search_indices.append(search_index)
 
-        # Bulk create search indices
-        PropertySearchIndex.objects.bulk_create(search_indices, ignore_conflicts=True)
-        self.stdout.write(f'Created {len(search_indices)} search indices') 
\ No newline at end of file
+            # Bulk create search indices a batch at a time
+            if len(search_indices) == batch_size:
+                self._upsert_search_indices(search_indices)
+                created_count += len(search_indices)
+                search_indices = []
+
+        self._upsert_search_indices(search_indices)
+        created_count += len(search_indices)
+        self.stdout.write(f'Created {created_count} search indices')
+
+    def _upsert_search_indices(self, search_indices):
+        PropertySearchIndex.objects.bulk_create(
+            search_indices,
+            update_conflicts=True,
+            unique_fields=['property'],
+            update_fields=['search_text'],
+        )
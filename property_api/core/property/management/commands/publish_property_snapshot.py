@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.property.snapshot import publish_property_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Publish the database as the immutable snapshot the API reads property data from'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            type=str,
+            default=None,
+            help='Snapshot file to replace (default: PROPERTY_SNAPSHOT_PATH)'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path'] or settings.PROPERTY_SNAPSHOT_PATH
+        if not path:
+            raise CommandError('Set PROPERTY_SNAPSHOT_PATH or pass --path')
+
+        self.stdout.write(f'Publishing snapshot to {path}...')
+        path = publish_property_snapshot(path)
+        self.stdout.write(self.style.SUCCESS(f'Published {path}'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from core.property.cache import get_lfu_stats
+
+
+class Command(BaseCommand):
+    help = 'Report the hit rates of the per-worker search and autocomplete caches'
+
+    def handle(self, *args, **options):
+        stats = get_lfu_stats()
+        if not stats:
+            self.stdout.write('No search cache stats published yet')
+            return
+
+        self.stdout.write(f'{"cache":<14}{"worker":<32}{"size":>12}{"hits":>10}{"misses":>10}{"hit rate":>10}')
+        totals = {}
+        for item in stats:
+            size = f'{item["size"]}/{item["maxsize"]}'
+            self.stdout.write(
+                f'{item["cache"]:<14}{item["worker"]:<32}{size:>12}'
+                f'{item["hits"]:>10}{item["misses"]:>10}{item["hit_rate"]:>10.1%}'
+            )
+            hits, misses = totals.get(item['cache'], (0, 0))
+            totals[item['cache']] = (hits + item['hits'], misses + item['misses'])
+
+        self.stdout.write('')
+        for name, (hits, misses) in totals.items():
+            lookups = hits + misses
+            hit_rate = hits / lookups if lookups else 0.0
+            self.stdout.write(f'{name}: {hit_rate:.1%} of {lookups} lookups across workers')
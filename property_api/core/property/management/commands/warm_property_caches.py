@@ -0,0 +1,150 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from core.property.models import Property
+
+
+class Command(BaseCommand):
+    help = 'Pre-populate the running API\'s property caches and the database page cache after an import'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            type=str,
+            default=None,
+            help='Base URL of the running API (default: PROPERTY_CACHE_WARMING_URL)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of requests sent in parallel'
+        )
+        parser.add_argument(
+            '--sample-pins',
+            type=int,
+            default=None,
+            help='Warm detail views for the first N PINs (default: from PROPERTY_CACHE_WARMING)'
+        )
+        parser.add_argument(
+            '--host',
+            type=str,
+            default=None,
+            help='Host header to send, when clients reach the API under another name than --url'
+        )
+        parser.add_argument(
+            '--accept',
+            action='append',
+            default=None,
+            help='Accept header to warm, as clients send it (repeatable; default: from PROPERTY_CACHE_WARMING)'
+        )
+        parser.add_argument(
+            '--no-scan',
+            action='store_true',
+            help='Skip the sequential scan that loads the properties table into the page cache'
+        )
+
+    def handle(self, *args, **options):
+        config = settings.PROPERTY_CACHE_WARMING
+        base_url = (options['url'] or settings.PROPERTY_CACHE_WARMING_URL).rstrip('/')
+        accepts = options['accept'] or config.get('accept', ['*/*'])
+        sample_pins = options['sample_pins']
+        if sample_pins is None:
+            sample_pins = config.get('sample_pins', 0)
+
+        start = time.perf_counter()
+
+        if not options['no_scan']:
+            self.stdout.write('Scanning properties table...')
+            scanned = sum(1 for _ in Property.objects.values_list('pin', 'latitude', 'longitude').iterator(chunk_size=5000))
+            self.stdout.write(f'Scanned {scanned} rows')
+
+        requests_to_send = [
+            (path, params, accept)
+            for path, params in self._build_requests(config, sample_pins)
+            for accept in accepts
+        ]
+        self.stdout.write(
+            f'Sending {len(requests_to_send)} requests to {base_url} with {options["workers"]} workers...'
+        )
+
+        # Every encoding is cached in one entry, so asking for one fills them all
+        headers = {'Accept-Encoding': 'br, gzip'}
+        if options['host']:
+            headers['Host'] = options['host']
+        sessions = threading.local()
+
+        def send(request_spec):
+            path, params, accept = request_spec
+            if not hasattr(sessions, 'session'):
+                sessions.session = requests.Session()
+            try:
+                response = sessions.session.get(
+                    base_url + path, params=params, headers={**headers, 'Accept': accept},
+                    timeout=settings.PROPERTY_CACHE_WARMING_TIMEOUT,
+                )
+            except requests.RequestException as e:
+                return path, params, str(e)
+            return path, params, response.status_code
+
+        failures = 0
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            for path, params, status in executor.map(send, requests_to_send):
+                if not isinstance(status, int) or status >= 400:
+                    failures += 1
+                    self.stdout.write(self.style.WARNING(f'{status} {path} {params}'))
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Warmed {len(requests_to_send) - failures} of {len(requests_to_send)} requests in {elapsed:.1f}s'
+            )
+        )
+
+    def _build_requests(self, config, sample_pins):
+        """Return (path, params) pairs for every hot request to warm"""
+        specs = [
+            (reverse('property:property-statistics'), {}),
+            (reverse('property:property-analytics'), {}),
+            (reverse('property:property-list'), {}),
+            (reverse('property:property-geojson'), {}),
+        ]
+
+        for query in config.get('searches', []):
+            specs.append((reverse('property:property-search'), {'q': query}))
+        for query in config.get('autocomplete', []):
+            specs.append((reverse('property:autocomplete-search'), {'q': query}))
+
+        grid = max(config.get('tile_grid', 1), 1)
+        for extent in config.get('geojson_extents', []):
+            for tile in self._tiles(extent, grid):
+                specs.append((reverse('property:property-geojson'), tile))
+
+        pins = list(config.get('detail_pins', []))
+        if sample_pins:
+            pins.extend(Property.objects.values_list('pin', flat=True)[:sample_pins])
+        for pin in dict.fromkeys(pins):
+            specs.append((reverse('property:property-detail', kwargs={'pin': pin}), {}))
+
+        return specs
+
+    def _tiles(self, extent, grid):
+        """Split a map extent into a grid x grid set of bounding boxes"""
+        lat_step = (extent['north'] - extent['south']) / grid
+        lon_step = (extent['east'] - extent['west']) / grid
+        for row in range(grid):
+            for col in range(grid):
+                south = extent['south'] + row * lat_step
+                west = extent['west'] + col * lon_step
+                yield {
+                    'north': round(south + lat_step, 6),
+                    'south': round(south, 6),
+                    'east': round(west + lon_step, 6),
+                    'west': round(west, 6),
+                }
@@ -0,0 +1,83 @@
+import pandas as pd
+
+from .importing import (
+    COUNTY_CSV_COLUMNS, content_hash, convert_frame, convert_ssa32_chunk, convert_str, iter_records,
+    read_csv_options,
+)
+
+
+# The 79th Street corridor export: the county columns plus the street address
+CORRIDOR_CSV_COLUMNS = {**COUNTY_CSV_COLUMNS, 'property_address': ('Address', convert_str)}
+
+
+def pin_key(pin):
+    """PIN with its formatting stripped, so '20-28-321-030-0000' matches '20283210300000'"""
+    return ''.join(character for character in str(pin) if character.isdigit())
+
+
+def _keyed(frame, keep):
+    """Index converted rows by normalized PIN, keeping one row per PIN"""
+    keys = frame['pin'].map(pin_key)
+    frame = frame.set_axis(keys.rename(None)).assign(pin=keys.to_numpy())
+    frame = frame[frame.index != '']
+    return frame[~frame.index.duplicated(keep=keep)]
+
+
+def _error_rows(errors):
+    # (row number, message, row, traceback), as convert_ssa32_chunk reports them
+    return [(row_number, message, None, None) for row_number, message in errors]
+
+
+def read_county_source(path):
+    frame, errors = convert_frame(pd.read_csv(path, **read_csv_options(COUNTY_CSV_COLUMNS)), COUNTY_CSV_COLUMNS)
+    # The hash `import_property_data --delta` compares against, so a later
+    # delta run leaves merged rows alone unless the county row changed
+    frame['content_hash'] = [content_hash(property_data) for property_data in iter_records(frame)]
+    return _keyed(frame, keep='first'), _error_rows(errors)
+
+
+def read_corridor_source(path):
+    frame, errors = convert_frame(pd.read_csv(path, **read_csv_options(CORRIDOR_CSV_COLUMNS)), CORRIDOR_CSV_COLUMNS)
+    return _keyed(frame, keep='first'), _error_rows(errors)
+
+
+def read_ssa32_source(path):
+    records, errors = convert_ssa32_chunk(pd.read_csv(path))
+    frame = pd.DataFrame([property_data for _, property_data in records], dtype=object)
+    # A later row for the same PIN wins, as in import_ssa32_data
+    return _keyed(frame, keep='last'), errors
+
+
+# Source name -> reader returning (frame indexed by PIN key, conversion errors)
+MERGE_SOURCE_READERS = {
+    'county': read_county_source,
+    'corridor': read_corridor_source,
+    'ssa32': read_ssa32_source,
+}
+
+
+def merge_sources(frames, precedence):
+    """
+    Outer join the source frames on PIN key.
+
+    Each field takes the value of the first source in its precedence list
+    (``precedence['default']`` unless the field has its own) that has a
+    non-null value for the PIN. Sources missing from a field's list never
+    supply it. Returns one row per PIN, with None for missing values.
+    """
+    index = None
+    for frame in frames.values():
+        index = frame.index if index is None else index.union(frame.index)
+    fields = list(dict.fromkeys(column for frame in frames.values() for column in frame.columns))
+
+    merged = {}
+    for field in fields:
+        column = pd.Series(None, index=index, dtype=object)
+        for source in precedence.get(field, precedence['default']):
+            frame = frames.get(source)
+            if frame is not None and field in frame.columns:
+                column = column.where(column.notna(), frame[field].reindex(index))
+        merged[field] = column
+
+    merged = pd.DataFrame(merged, index=index)
+    return merged.astype(object).where(merged.notna(), None)
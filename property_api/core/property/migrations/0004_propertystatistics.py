@@ -0,0 +1,27 @@
+# Generated by Django 5.1.2 on 2026-10-19 01:05
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property', '0003_datasetversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dataset_version', models.PositiveIntegerField(help_text='Dataset version the statistics were computed from')),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'property statistics',
+                'db_table': 'property_statistics',
+            },
+        ),
+    ]
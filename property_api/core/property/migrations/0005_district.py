@@ -0,0 +1,77 @@
+# Generated by Django 5.1.2 on 2026-10-19 01:11
+
+from django.db import migrations, models
+
+
+# District kind -> (code column, name column) on Property at this point in history
+DISTRICT_COLUMNS = {
+    'school_elementary_district': ('school_elementary_district_geoid', 'school_elementary_district_name'),
+    'school_secondary_district': ('school_secondary_district_geoid', 'school_secondary_district_name'),
+    'school_unified_district': ('school_unified_district_geoid', 'school_unified_district_name'),
+    'tax_municipality': ('tax_municipality_num', 'tax_municipality_name'),
+    'tax_school_elementary_district': ('tax_school_elementary_district_num', 'tax_school_elementary_district_name'),
+    'tax_school_secondary_district': ('tax_school_secondary_district_num', 'tax_school_secondary_district_name'),
+    'tax_community_college_district': ('tax_community_college_district_num', 'tax_community_college_district_name'),
+    'tax_fire_protection_district': ('tax_fire_protection_district_num', 'tax_fire_protection_district_name'),
+    'tax_library_district': ('tax_library_district_num', 'tax_library_district_name'),
+    'tax_park_district': ('tax_park_district_num', 'tax_park_district_name'),
+    'tax_tif_district': ('tax_tif_district_num', 'tax_tif_district_name'),
+}
+
+
+def district_code(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def populate_districts(apps, schema_editor):
+    Property = apps.get_model('property', 'Property')
+    District = apps.get_model('property', 'District')
+    db_alias = schema_editor.connection.alias
+    districts = {}
+    for kind, (code_field, name_field) in DISTRICT_COLUMNS.items():
+        pairs = Property.objects.using(db_alias) \
+                                .exclude(**{f'{code_field}__isnull': True}) \
+                                .exclude(**{f'{name_field}__isnull': True}) \
+                                .order_by() \
+                                .values_list(code_field, name_field) \
+                                .distinct()
+        for code, name in pairs:
+            districts[(kind, district_code(code))] = name
+    District.objects.using(db_alias).bulk_create(
+        [District(kind=kind, code=code, name=name) for (kind, code), name in districts.items()]
+    )
+
+
+def restore_district_names(apps, schema_editor):
+    Property = apps.get_model('property', 'Property')
+    District = apps.get_model('property', 'District')
+    db_alias = schema_editor.connection.alias
+    for district in District.objects.using(db_alias):
+        code_field, name_field = DISTRICT_COLUMNS[district.kind]
+        Property.objects.using(db_alias).filter(**{code_field: district.code}).update(**{name_field: district.name})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property', '0004_propertystatistics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='District',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(help_text='District kind, e.g. tax_park_district', max_length=50)),
+                ('code', models.CharField(help_text='District code as stored on Property', max_length=20)),
+                ('name', models.CharField(max_length=200)),
+            ],
+            options={
+                'db_table': 'property_districts',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'code'), name='unique_district_kind_code')],
+            },
+        ),
+        migrations.RunPython(populate_districts, restore_district_names),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.2 on 2026-10-19 01:11
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property', '0005_district'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='property',
+            name='school_elementary_district_name',
+        ),
+        migrations.RemoveField(
+            model_name='property',
+            name='school_secondary_district_name',
+        ),
+        migrations.RemoveField(
+            model_name='property',
+            name='school_unified_district_name',
+        ),
+        migrations.RemoveField(
+            model_name='property',
+            name='tax_community_college_district_name',
+        ),
+        migrations.RemoveField(
+            model_name='property',
+            name='tax_fire_protection_district_name',
+        ),
+        migrations.RemoveField(
+            model_name='property',
+            name='tax_library_district_name',
+        ),
+        migrations.RemoveField(
+            model_name='property',
+            name='tax_municipality_name',
+        ),
+        migrations.RemoveField(
+            model_name='property',
+            name='tax_park_district_name',
+        ),
+        migrations.RemoveField(
+            model_name='property',
+            name='tax_school_elementary_district_name',
+        ),
+        migrations.RemoveField(
+            model_name='property',
+            name='tax_school_secondary_district_name',
+        ),
+        migrations.RemoveField(
+            model_name='property',
+            name='tax_tif_district_name',
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-19 01:13
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property', '0006_remove_property_district_names'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pin', models.CharField(help_text='Property Identification Number', max_length=20)),
+                ('year', models.IntegerField(help_text='Tax year')),
+                ('changes', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Columns changed since the prior year')),
+                ('recorded_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'property_snapshots',
+                'ordering': ['pin', 'year'],
+                'constraints': [models.UniqueConstraint(fields=('pin', 'year'), name='unique_property_snapshot_pin_year')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.2 on 2026-10-19 01:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property', '0007_propertysnapshot'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='property',
+            name='properties_pin_97aa95_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='property',
+            name='properties_zip_cod_924e35_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='property',
+            name='properties_ward_nu_45c595_idx',
+        ),
+        migrations.AlterField(
+            model_name='property',
+            name='zip_code',
+            field=models.CharField(blank=True, max_length=10, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['class_code', 'pin'], name='properties_class_pin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['zip_code', 'class_code', 'pin'], name='properties_zip_class_pin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['ward_num', 'class_code', 'pin'], name='properties_ward_class_pin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('vacancy_type__isnull', False)), fields=['vacancy_type', 'pin'], name='properties_vacancy_pin_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-19 01:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property', '0008_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, help_text='Hash of the imported county CSV row', max_length=32, null=True),
+        ),
+        migrations.CreateModel(
+            name='PropertyChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pin', models.CharField(help_text='Property Identification Number', max_length=20)),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted')], max_length=10)),
+                ('dataset_version', models.PositiveIntegerField(blank=True, help_text='Dataset version that published the change', null=True)),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'property_changes',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['dataset_version', 'pin'], name='property_ch_dataset_143071_idx'), models.Index(fields=['pin'], name='property_ch_pin_97fa31_idx')],
+            },
+        ),
+    ]
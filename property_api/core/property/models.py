@@ -1,4 +1,5 @@
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import RegexValidator
 
 
@@ -22,7 +23,7 @@ class Property(models.Model):
     latitude = models.FloatField(help_text="Latitude coordinate")
     x_3435 = models.FloatField(null=True, blank=True, help_text="X coordinate in Illinois State Plane")
     y_3435 = models.FloatField(null=True, blank=True, help_text="Y coordinate in Illinois State Plane")
-    zip_code = models.CharField(max_length=10, null=True, blank=True, db_index=True)
+    zip_code = models.CharField(max_length=10, null=True, blank=True)
     
     # SSA 32 Property Information
     property_address = models.CharField(max_length=200, null=True, blank=True, help_text="Property street address")
@@ -70,33 +71,22 @@ class Property(models.Model):
     chicago_community_area_name = models.CharField(max_length=100, null=True, blank=True)
     chicago_police_district_num = models.IntegerField(null=True, blank=True)
     
-    # School districts
+    # School districts (names live in District, keyed by these codes)
     school_elementary_district_geoid = models.CharField(max_length=20, null=True, blank=True)
-    school_elementary_district_name = models.CharField(max_length=200, null=True, blank=True)
     school_secondary_district_geoid = models.CharField(max_length=20, null=True, blank=True)
-    school_secondary_district_name = models.CharField(max_length=200, null=True, blank=True)
     school_unified_district_geoid = models.CharField(max_length=20, null=True, blank=True)
-    school_unified_district_name = models.CharField(max_length=200, null=True, blank=True)
     school_school_year = models.CharField(max_length=20, null=True, blank=True)
     school_data_year = models.IntegerField(null=True, blank=True)
     
-    # Tax districts
+    # Tax districts (names live in District, keyed by these codes)
     tax_municipality_num = models.CharField(max_length=20, null=True, blank=True)
-    tax_municipality_name = models.CharField(max_length=100, null=True, blank=True)
     tax_school_elementary_district_num = models.CharField(max_length=20, null=True, blank=True)
-    tax_school_elementary_district_name = models.CharField(max_length=200, null=True, blank=True)
     tax_school_secondary_district_num = models.CharField(max_length=20, null=True, blank=True)
-    tax_school_secondary_district_name = models.CharField(max_length=200, null=True, blank=True)
     tax_community_college_district_num = models.CharField(max_length=20, null=True, blank=True)
-    tax_community_college_district_name = models.CharField(max_length=200, null=True, blank=True)
     tax_fire_protection_district_num = models.CharField(max_length=20, null=True, blank=True)
-    tax_fire_protection_district_name = models.CharField(max_length=200, null=True, blank=True)
     tax_library_district_num = models.CharField(max_length=20, null=True, blank=True)
-    tax_library_district_name = models.CharField(max_length=200, null=True, blank=True)
     tax_park_district_num = models.CharField(max_length=20, null=True, blank=True)
-    tax_park_district_name = models.CharField(max_length=200, null=True, blank=True)
     tax_tif_district_num = models.FloatField(null=True, blank=True)
-    tax_tif_district_name = models.CharField(max_length=200, null=True, blank=True)
     tax_data_year = models.IntegerField(null=True, blank=True)
     
     # Environmental data
@@ -125,6 +115,10 @@ class Property(models.Model):
     misc_subdivision_id = models.CharField(max_length=50, null=True, blank=True)
     misc_subdivision_data_year = models.FloatField(null=True, blank=True)
     
+    # Hash of the source CSV row, compared by `import_property_data --delta`
+    content_hash = models.CharField(max_length=32, null=True, blank=True, editable=False,
+                                    help_text="Hash of the imported county CSV row")
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -132,12 +126,19 @@ class Property(models.Model):
     class Meta:
         db_table = 'properties'
         indexes = [
-            models.Index(fields=['pin']),
-            models.Index(fields=['zip_code']),
             models.Index(fields=['latitude', 'longitude']),
             models.Index(fields=['chicago_community_area_num']),
-            models.Index(fields=['ward_num']),
             models.Index(fields=['township_name']),
+            # Filter combinations seen on the list and export endpoints (see
+            # analyze_query_shapes), ending in the default ordering so rows
+            # come back sorted from a single index range scan
+            models.Index(fields=['class_code', 'pin'], name='properties_class_pin_idx'),
+            models.Index(fields=['zip_code', 'class_code', 'pin'], name='properties_zip_class_pin_idx'),
+            models.Index(fields=['ward_num', 'class_code', 'pin'], name='properties_ward_class_pin_idx'),
+            models.Index(
+                fields=['vacancy_type', 'pin'], name='properties_vacancy_pin_idx',
+                condition=models.Q(vacancy_type__isnull=False)
+            ),
         ]
         ordering = ['pin']
     
@@ -193,4 +194,110 @@ class PropertySearchIndex(models.Model):
         db_table = 'property_search_index'
     
     def __str__(self):
-        return f"Search index for {self.property.pin}" 
\ No newline at end of file
+        return f"Search index for {self.property.pin}" 
+
+
+class District(models.Model):
+    """
+    School and tax district names, shared by thousands of parcels. Property
+    stores only the district codes; see core.property.districts.
+    """
+    kind = models.CharField(max_length=50, help_text="District kind, e.g. tax_park_district")
+    code = models.CharField(max_length=20, help_text="District code as stored on Property")
+    name = models.CharField(max_length=200)
+    
+    class Meta:
+        db_table = 'property_districts'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'code'], name='unique_district_kind_code'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} {self.code}: {self.name}"
+
+
+class PropertySnapshot(models.Model):
+    """
+    One tax year of a property's history. The first year a PIN is seen holds
+    every tracked column; later years hold only the columns that changed
+    since the prior year. See core.property.history.
+    """
+    pin = models.CharField(max_length=20, help_text="Property Identification Number")
+    year = models.IntegerField(help_text="Tax year")
+    changes = models.JSONField(encoder=DjangoJSONEncoder, help_text="Columns changed since the prior year")
+    recorded_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'property_snapshots'
+        constraints = [
+            # Also the (pin, year) index every history and as-of query range-scans
+            models.UniqueConstraint(fields=['pin', 'year'], name='unique_property_snapshot_pin_year'),
+        ]
+        ordering = ['pin', 'year']
+    
+    def __str__(self):
+        return f"PIN: {self.pin} - {self.year}"
+
+
+class PropertyChange(models.Model):
+    """
+    A property inserted, updated or deleted by a delta import. Rows are
+    stamped with the dataset version the import published.
+    """
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    ACTION_CHOICES = [
+        (CREATED, 'Created'),
+        (UPDATED, 'Updated'),
+        (DELETED, 'Deleted'),
+    ]
+    
+    pin = models.CharField(max_length=20, help_text="Property Identification Number")
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    dataset_version = models.PositiveIntegerField(null=True, blank=True,
+                                                  help_text="Dataset version that published the change")
+    recorded_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'property_changes'
+        indexes = [
+            models.Index(fields=['dataset_version', 'pin']),
+            models.Index(fields=['pin']),
+        ]
+        ordering = ['-id']
+    
+    def __str__(self):
+        return f"PIN: {self.pin} - {self.action}"
+
+
+class DatasetVersion(models.Model):
+    """
+    Version of the imported property dataset, bumped by the import commands.
+    A single row; read it through core.property.dataset rather than directly.
+    """
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'property_dataset_version'
+    
+    def __str__(self):
+        return f"Dataset version {self.version}"
+
+
+class PropertyStatistics(models.Model):
+    """
+    Summary statistics materialized at the end of each import, so the
+    statistics endpoint reads one row instead of scanning properties
+    """
+    dataset_version = models.PositiveIntegerField(help_text="Dataset version the statistics were computed from")
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'property_statistics'
+        verbose_name_plural = 'property statistics'
+    
+    def __str__(self):
+        return f"Statistics for dataset version {self.dataset_version}"
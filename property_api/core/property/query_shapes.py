@@ -0,0 +1,104 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db import models
+
+from .cache import hash_key_parts
+
+
+QUERY_SHAPES_KEY = 'property:query_shapes'
+
+
+def query_shape(query_params, filter_fields, ordering_fields, default_ordering):
+    """
+    Return (filters, ordering) for a list request: the filter columns it
+    uses and the ordering it resolves to, ignoring the filter values
+    """
+    filters = tuple(sorted(name for name in filter_fields if query_params.get(name)))
+    ordering = tuple(
+        term for term in query_params.get('ordering', '').replace(' ', '').split(',')
+        if term.lstrip('-') in ordering_fields
+    ) or tuple(default_ordering)
+    return filters, ordering
+
+
+def _register_query_shape(key, shape):
+    """Add a shape to the registry get_query_shapes lists, if it is missing"""
+    shapes = cache.get(QUERY_SHAPES_KEY, {})
+    if key not in shapes:
+        shapes[key] = shape
+        cache.set(QUERY_SHAPES_KEY, shapes, timeout=None)
+
+
+def record_query_shape(shape):
+    """
+    Count one database query of the given shape in the shared cache.
+
+    Registering is a get/modify/set of one shared dict, so two shapes first
+    seen at the same time can drop each other's registration. Each shape
+    re-checks its registration when its count reaches a power of two, which
+    repairs a lost one without touching the registry on every request.
+    """
+    key = f'{QUERY_SHAPES_KEY}:{hash_key_parts(shape)}'
+    if cache.add(key, 1, timeout=None):
+        _register_query_shape(key, shape)
+        return
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Evicted since the add; the next request starts counting again
+        return
+    if count & (count - 1) == 0:
+        _register_query_shape(key, shape)
+
+
+def get_query_shapes():
+    """Return [(shape, count)] for every recorded shape, most frequent first"""
+    shapes = cache.get(QUERY_SHAPES_KEY, {})
+    counts = cache.get_many(list(shapes))
+    return sorted(
+        ((shape, counts.get(key, 0)) for key, shape in shapes.items()),
+        key=lambda item: -item[1]
+    )
+
+
+def reset_query_shapes():
+    shapes = cache.get(QUERY_SHAPES_KEY, {})
+    cache.delete_many([*shapes, QUERY_SHAPES_KEY])
+
+
+def _index_columns(model):
+    """Leading column lists of every index the model already has"""
+    columns = [list(index.fields) for index in model._meta.indexes]
+    columns.extend([field.name] for field in model._meta.concrete_fields if field.db_index or field.unique)
+    return columns
+
+
+def propose_index(model, shape):
+    """
+    Return a models.Index serving a query shape, or None when an existing
+    index already does.
+
+    Equality filter columns come first, then the ordering columns, so one
+    index range scan returns rows already sorted. Nullable filter columns
+    make the index partial (``IS NOT NULL``), since an equality filter
+    never matches NULL and those rows need not be indexed.
+    """
+    filters, ordering = shape
+    fields = list(filters)
+    fields.extend(term.lstrip('-') for term in ordering if term.lstrip('-') not in fields)
+    if not fields:
+        return None
+
+    for existing in _index_columns(model):
+        if existing[:len(fields)] == fields:
+            return None
+
+    nullable = [name for name in filters if model._meta.get_field(name).null]
+    condition = models.Q(**{f'{name}__isnull': False for name in nullable}) if nullable else None
+    digest = hashlib.md5(repr((fields, nullable)).encode()).hexdigest()[:8]
+    return models.Index(
+        fields=fields,
+        name=f'{model._meta.db_table[:12]}_{digest}_idx',
+        condition=condition,
+    )
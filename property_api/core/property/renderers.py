@@ -0,0 +1,235 @@
+import abc
+import csv
+import datetime
+import decimal
+import io
+
+import msgpack
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.db import models
+from rest_framework.renderers import BaseRenderer
+
+from core.util.renderers import ORJSON_OPTIONS, orjson_default
+
+
+# Arrow types for model columns, so streamed batches share one schema
+# instead of re-inferring it (and disagreeing) chunk by chunk
+ARROW_FIELD_TYPES = (
+    (models.BooleanField, pa.bool_()),
+    (models.FloatField, pa.float64()),
+    (models.IntegerField, pa.int64()),
+    (models.DateTimeField, pa.timestamp('us', tz='UTC')),
+    (models.DateField, pa.date32()),
+)
+
+
+def columns_from_rows(rows):
+    """Transpose a list of row dicts into a dict of column lists"""
+    columns = {}
+    for index, row in enumerate(rows):
+        for name, value in row.items():
+            # Columns first seen late are back-filled so every column has len(rows) values
+            columns.setdefault(name, [None] * index).append(value)
+    return columns
+
+
+def tabular_payload(data):
+    """
+    Return (columns, metadata) for a renderer payload.
+
+    Accepts the column dicts built by the export endpoint, paginated list
+    pages ({'count', 'next', 'previous', 'results'}) and plain dicts such as
+    error responses, which become a single row.
+    """
+    if isinstance(data, dict) and isinstance(data.get('results'), list):
+        metadata = {key: value for key, value in data.items() if key != 'results'}
+        return columns_from_rows(data['results']), metadata
+    if isinstance(data, dict) and data and all(isinstance(value, list) for value in data.values()):
+        return data, {}
+    if isinstance(data, list):
+        return columns_from_rows(data), {}
+    return columns_from_rows([data]), {}
+
+
+def arrow_schema(model, names):
+    """Build an Arrow schema for the given model columns"""
+    fields = []
+    for name in names:
+        field = model._meta.get_field(name)
+        if isinstance(field, models.DecimalField):
+            arrow_type = pa.decimal128(field.max_digits, field.decimal_places)
+        else:
+            arrow_type = next(
+                (arrow_type for field_class, arrow_type in ARROW_FIELD_TYPES
+                 if isinstance(field, field_class)),
+                pa.string()
+            )
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def record_batch(names, rows, schema):
+    """Convert a chunk of value tuples into an Arrow record batch"""
+    columns = list(zip(*rows)) or [()] * len(names)
+    return pa.record_batch(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+        schema=schema
+    )
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents are drained between chunks"""
+
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def msgpack_default(obj):
+    """Encode the database types msgpack does not handle natively"""
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    raise TypeError(f'Object of type {type(obj).__name__} is not MessagePack serializable')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders response data as MessagePack, with decimals as floats
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=msgpack_default, datetime=True, use_bin_type=True)
+
+
+class StreamingRenderer(BaseRenderer, abc.ABC):
+    """
+    Renderer that can also encode rows incrementally.
+
+    ``stream(names, chunks, schema)`` takes column names and an iterable of
+    row chunks (lists of value tuples) and yields bytes per chunk, so views
+    can return a StreamingHttpResponse with flat memory. ``render`` handles
+    ordinary payloads such as error responses.
+    """
+    charset = None
+    requires_schema = False
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        columns, _ = tabular_payload(data)
+        names = list(columns)
+        rows = list(zip(*columns.values()))
+        schema = pa.table(columns).schema if self.requires_schema else None
+        return b''.join(self.stream(names, [rows], schema))
+
+    @abc.abstractmethod
+    def stream(self, names, chunks, schema=None):
+        """Yield the encoded bytes for each chunk of rows"""
+
+
+class CSVRenderer(StreamingRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, names, chunks, schema=None):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        for rows in chunks:
+            writer.writerows(rows)
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+        # Header only, when there were no rows
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+
+
+class NDJSONRenderer(StreamingRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def stream(self, names, chunks, schema=None):
+        for rows in chunks:
+            yield b''.join(
+                orjson.dumps(dict(zip(names, row)), default=orjson_default, option=ORJSON_OPTIONS) + b'\n'
+                for row in rows
+            )
+
+
+class ParquetRenderer(StreamingRenderer):
+    """
+    Streams a Parquet file with one row group per chunk
+    """
+    media_type = 'application/vnd.apache.parquet'
+    format = 'parquet'
+    render_style = 'binary'
+    requires_schema = True
+
+    def stream(self, names, chunks, schema=None):
+        sink = ChunkSink()
+        with pq.ParquetWriter(sink, schema) as writer:
+            for rows in chunks:
+                writer.write_batch(record_batch(names, rows, schema))
+                yield sink.drain()
+        # Footer
+        yield sink.drain()
+
+
+class ArrowIPCRenderer(StreamingRenderer):
+    """
+    Renders tabular response data as an Apache Arrow IPC stream, one record
+    batch per chunk. Pagination fields are kept in the schema metadata.
+    """
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+    render_style = 'binary'
+    requires_schema = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        columns, metadata = tabular_payload(data)
+        table = pa.table(columns)
+        if metadata:
+            table = table.replace_schema_metadata(
+                {key: '' if value is None else str(value) for key, value in metadata.items()}
+            )
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    def stream(self, names, chunks, schema=None):
+        sink = ChunkSink()
+        with pa.ipc.new_stream(sink, schema) as writer:
+            for rows in chunks:
+                writer.write_batch(record_batch(names, rows, schema))
+                yield sink.drain()
+        # End-of-stream marker
+        yield sink.drain()
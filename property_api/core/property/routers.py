@@ -0,0 +1,106 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+
+
+PRIMARY_DATABASE = DEFAULT_DB_ALIAS
+SNAPSHOT_DATABASE = 'property_snapshot'
+
+_use_primary = ContextVar('property_use_primary', default=False)
+
+# Per-worker record of how far each replica has caught up: alias -> (dataset version, monotonic expiry)
+_replica_versions = {}
+
+
+@contextmanager
+def primary_database():
+    """
+    Route property reads to the primary (writable) database. The import
+    commands run inside this, since they read back what they have just written.
+    """
+    token = _use_primary.set(True)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+def replica_dataset_version(alias):
+    """
+    Return the dataset version a replica has applied, re-read at most every
+    PROPERTY_REPLICA_LAG_CHECK_INTERVAL seconds, or None if it is unreachable
+    """
+    from .models import DatasetVersion
+
+    version, expires_at = _replica_versions.get(alias, (None, 0.0))
+    if time.monotonic() < expires_at:
+        return version
+    try:
+        version = DatasetVersion.objects.using(alias).filter(pk=1).values_list('version', flat=True).first() or 0
+    except DatabaseError:
+        version = None
+    _replica_versions[alias] = (version, time.monotonic() + settings.PROPERTY_REPLICA_LAG_CHECK_INTERVAL)
+    return version
+
+
+def caught_up_replicas():
+    """
+    Replicas whose data is at most PROPERTY_REPLICA_MAX_VERSION_LAG dataset
+    versions behind the primary. Imports bump the version after loading the
+    data, so a replica that has the version has also replayed the load.
+    """
+    from .dataset import get_dataset_version
+
+    oldest_allowed = get_dataset_version().version - settings.PROPERTY_REPLICA_MAX_VERSION_LAG
+    replicas = []
+    for alias in settings.PROPERTY_READ_REPLICAS:
+        version = replica_dataset_version(alias)
+        if version is not None and version >= oldest_allowed:
+            replicas.append(alias)
+    return replicas
+
+
+class PropertyRouter:
+    """
+    Routes the property app's traffic.
+
+    Writes always go to the primary. Reads go to the published read-only
+    snapshot when PROPERTY_SNAPSHOT_PATH is set. Otherwise they go to a
+    random read replica that is caught up with the current dataset version,
+    falling back to the primary when none is (or none are configured).
+    DatasetVersion itself is read from the primary in replica mode, since it
+    is what replica lag is measured against.
+    """
+    app_label = 'property'
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label != self.app_label or _use_primary.get():
+            return None
+        if settings.PROPERTY_SNAPSHOT_PATH:
+            return SNAPSHOT_DATABASE
+        if settings.PROPERTY_READ_REPLICAS and model._meta.model_name != 'datasetversion':
+            replicas = caught_up_replicas()
+            return random.choice(replicas) if replicas else PRIMARY_DATABASE
+        return None
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label == self.app_label:
+            # Rows read from the snapshot or a replica must not be saved back to it
+            return PRIMARY_DATABASE
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if obj1._meta.app_label == obj2._meta.app_label == self.app_label:
+            # The snapshot and replicas are copies of the primary
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db == SNAPSHOT_DATABASE or db in settings.PROPERTY_READ_REPLICAS:
+            # Copies of the primary, never migrated in place
+            return False
+        return None
@@ -1,8 +1,87 @@
 from rest_framework import serializers
+from .districts import DISTRICT_CODE_FIELDS, district_name
 from .models import Property, PropertySearchIndex
 
 
-class PropertySummarySerializer(serializers.ModelSerializer):
+# Model columns each computed field reads, so projected querysets can defer the rest
+COMPUTED_FIELD_SOURCES = {
+    'coordinates': ('longitude', 'latitude'),
+    'address_display': (
+        'pin', 'property_address', 'property_city', 'property_state',
+        'zip_code', 'chicago_community_area_name'
+    ),
+    'nearby_properties_count': ('longitude', 'latitude'),
+    **{f'{kind}_name': (code_field,) for kind, code_field in DISTRICT_CODE_FIELDS.items()},
+}
+
+
+def parse_field_list(value):
+    """Split a comma separated ?fields= / ?exclude= value into field names"""
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class SparseFieldsetMixin:
+    """
+    Restricts serializer output to a projection of its fields.
+
+    Views resolve the projection from ``?fields=`` / ``?exclude=`` with
+    ``resolve_projection`` and pass it in the serializer context; the same
+    projection narrows the queryset through ``projected_model_fields``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        projection = self.context.get('projection')
+        if projection is not None:
+            for name in set(self.fields) - set(projection):
+                self.fields.pop(name)
+
+    @classmethod
+    def resolve_projection(cls, query_params):
+        """Return the selected field names, or None when no projection was requested"""
+        fields = parse_field_list(query_params.get('fields', ''))
+        exclude = parse_field_list(query_params.get('exclude', ''))
+        if not fields and not exclude:
+            return None
+
+        available = list(cls().fields)
+        unknown = [name for name in fields + exclude if name not in available]
+        if unknown:
+            raise serializers.ValidationError(
+                {'fields': f"Unknown field(s): {', '.join(unknown)}"}
+            )
+
+        selected = fields or available
+        return [name for name in selected if name not in exclude]
+
+    @classmethod
+    def projected_model_fields(cls, projection):
+        """Return the model columns needed to render the given projection"""
+        concrete = {field.name for field in cls.Meta.model._meta.concrete_fields}
+        columns = set()
+        for name in projection:
+            if name in concrete:
+                columns.add(name)
+            columns.update(COMPUTED_FIELD_SOURCES.get(name, ()))
+        return sorted(columns)
+
+
+class DistrictNameField(serializers.ReadOnlyField):
+    """
+    Renders a district code column as the district's name, looked up in the
+    cached District dimension
+    """
+
+    def __init__(self, kind, **kwargs):
+        self.kind = kind
+        kwargs.setdefault('source', DISTRICT_CODE_FIELDS[kind])
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return district_name(self.kind, value)
+
+
+class PropertySummarySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Lightweight serializer for property list views and map markers
     """
@@ -23,24 +102,38 @@ class PropertySummarySerializer(serializers.ModelSerializer):
         ]
 
 
-class PropertyDetailSerializer(serializers.ModelSerializer):
+class PropertyDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Comprehensive serializer for detailed property information
     """
     coordinates = serializers.ReadOnlyField()
     address_display = serializers.ReadOnlyField()
     nearby_properties_count = serializers.SerializerMethodField()
+    school_elementary_district_name = DistrictNameField('school_elementary_district')
+    school_secondary_district_name = DistrictNameField('school_secondary_district')
+    school_unified_district_name = DistrictNameField('school_unified_district')
+    tax_municipality_name = DistrictNameField('tax_municipality')
+    tax_school_elementary_district_name = DistrictNameField('tax_school_elementary_district')
+    tax_school_secondary_district_name = DistrictNameField('tax_school_secondary_district')
+    tax_community_college_district_name = DistrictNameField('tax_community_college_district')
+    tax_fire_protection_district_name = DistrictNameField('tax_fire_protection_district')
+    tax_library_district_name = DistrictNameField('tax_library_district')
+    tax_park_district_name = DistrictNameField('tax_park_district')
+    tax_tif_district_name = DistrictNameField('tax_tif_district')
     
     class Meta:
         model = Property
-        fields = '__all__'
+        exclude = ['content_hash']
     
     def get_nearby_properties_count(self, obj):
         """Return count of nearby properties within 1km"""
+        nearby = self.context.get('nearby_properties')
+        if nearby is not None:
+            return len(nearby)
         return obj.nearby_properties().count()
 
 
-class PropertyLocationSerializer(serializers.ModelSerializer):
+class PropertyLocationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Minimal serializer for location-based queries
     """
@@ -60,6 +153,9 @@ class PropertySchoolInfoSerializer(serializers.ModelSerializer):
     """
     coordinates = serializers.ReadOnlyField()
     address_display = serializers.ReadOnlyField()
+    school_elementary_district_name = DistrictNameField('school_elementary_district')
+    school_secondary_district_name = DistrictNameField('school_secondary_district')
+    school_unified_district_name = DistrictNameField('school_unified_district')
     
     class Meta:
         model = Property
@@ -78,6 +174,14 @@ class PropertyTaxInfoSerializer(serializers.ModelSerializer):
     """
     coordinates = serializers.ReadOnlyField()
     address_display = serializers.ReadOnlyField()
+    tax_municipality_name = DistrictNameField('tax_municipality')
+    tax_school_elementary_district_name = DistrictNameField('tax_school_elementary_district')
+    tax_school_secondary_district_name = DistrictNameField('tax_school_secondary_district')
+    tax_community_college_district_name = DistrictNameField('tax_community_college_district')
+    tax_fire_protection_district_name = DistrictNameField('tax_fire_protection_district')
+    tax_library_district_name = DistrictNameField('tax_library_district')
+    tax_park_district_name = DistrictNameField('tax_park_district')
+    tax_tif_district_name = DistrictNameField('tax_tif_district')
     
     class Meta:
         model = Property
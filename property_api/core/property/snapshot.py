@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+
+from .routers import SNAPSHOT_DATABASE
+
+
+def publish_property_snapshot(path=None):
+    """
+    Publish the default database as an immutable snapshot.
+
+    Copies it into a new file next to ``path`` with ``VACUUM INTO``, which
+    also compacts it. ANALYZE then runs on the copy so readers get planner
+    statistics, and ``os.replace`` swaps it in atomically. Connections
+    already open keep reading the previous file until they reconnect, so no
+    reader ever sees a half-loaded dataset.
+    """
+    path = os.path.abspath(path or settings.PROPERTY_SNAPSHOT_PATH)
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor != 'sqlite':
+        raise ImproperlyConfigured('Property snapshots require the default database to be SQLite')
+
+    fd, building = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.snapshot-', suffix='.sqlite3')
+    os.close(fd)
+    # VACUUM INTO needs the target not to exist
+    os.unlink(building)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM INTO %s', [building])
+
+        snapshot = sqlite3.connect(building)
+        try:
+            # Immutable readers ignore journals, so leave none behind
+            snapshot.execute('PRAGMA journal_mode = DELETE')
+            snapshot.execute('ANALYZE')
+            snapshot.commit()
+        finally:
+            snapshot.close()
+
+        with open(building, 'rb') as snapshot_file:
+            os.fsync(snapshot_file.fileno())
+        os.replace(building, path)
+    except BaseException:
+        if os.path.exists(building):
+            os.unlink(building)
+        raise
+
+    directory = os.open(os.path.dirname(path), os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+    return path
+
+
+def _remember_snapshot_inode(sender, connection, **kwargs):
+    if connection.alias == SNAPSHOT_DATABASE:
+        connection.snapshot_inode = os.stat(settings.PROPERTY_SNAPSHOT_PATH).st_ino
+
+
+def _reconnect_if_replaced(**kwargs):
+    """
+    Close a persistent snapshot connection once a newer snapshot has been
+    published, so the request opens the new file
+    """
+    connection = connections[SNAPSHOT_DATABASE]
+    if connection.connection is None:
+        return
+    try:
+        replaced = os.stat(settings.PROPERTY_SNAPSHOT_PATH).st_ino != getattr(connection, 'snapshot_inode', None)
+    except FileNotFoundError:
+        return
+    if replaced:
+        connection.close()
+
+
+def connect_snapshot_signals():
+    if settings.PROPERTY_SNAPSHOT_PATH:
+        connection_created.connect(_remember_snapshot_inode)
+        request_started.connect(_reconnect_if_replaced)
@@ -0,0 +1,90 @@
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from .dataset import get_dataset_version
+from .models import Property, PropertyStatistics
+from .routers import primary_database
+
+
+STATISTICS_COLUMNS = (
+    'chicago_community_area_name', 'zip_code', 'ward_num', 'class_code',
+    'total_assessed_value',
+)
+
+
+def _breakdown(counts, totals, key_name):
+    """Per-key property count and total assessed value, largest first"""
+    return [
+        {key_name: key, 'count': count, 'total_assessed_value': totals[key]}
+        for key, count in sorted(
+            counts.items(), key=lambda item: (-item[1], item[0] is None, str(item[0]))
+        )
+    ]
+
+
+def compute_property_statistics():
+    """
+    Compute every summary statistic in a single pass over properties.
+
+    Distinct counts include NULL as a value, matching
+    values(...).distinct().count().
+    """
+    areas = Counter()
+    zip_codes = set()
+    ward_counts = Counter()
+    ward_totals = defaultdict(Decimal)
+    class_counts = Counter()
+    class_totals = defaultdict(Decimal)
+    total = 0
+
+    rows = Property.objects.order_by().values_list(*STATISTICS_COLUMNS).iterator(chunk_size=5000)
+    for area, zip_code, ward, class_code, assessed_value in rows:
+        total += 1
+        areas[area] += 1
+        zip_codes.add(zip_code)
+        ward_counts[ward] += 1
+        class_counts[class_code] += 1
+        if assessed_value is not None:
+            ward_totals[ward] += assessed_value
+            class_totals[class_code] += assessed_value
+
+    return {
+        'total_properties': total,
+        'community_areas': len(areas),
+        'zip_codes': len(zip_codes),
+        'wards': len(ward_counts),
+        'property_classes': len(class_counts),
+        'top_community_areas': [
+            {'chicago_community_area_name': area, 'count': count}
+            for area, count in areas.most_common(10)
+        ],
+        'by_ward': _breakdown(ward_counts, ward_totals, 'ward_num'),
+        'by_class': _breakdown(class_counts, class_totals, 'class_code'),
+    }
+
+
+def refresh_property_statistics():
+    """Recompute and store the statistics row for the current dataset version"""
+    statistics, _ = PropertyStatistics.objects.update_or_create(
+        pk=1,
+        defaults={
+            'dataset_version': get_dataset_version().version,
+            'data': compute_property_statistics(),
+        }
+    )
+    return statistics
+
+
+def get_property_statistics():
+    """
+    Return the materialized statistics, recomputing them only if they are
+    missing or were computed from an older dataset version
+    """
+    statistics = PropertyStatistics.objects.filter(pk=1).first()
+    if statistics is None or statistics.dataset_version < get_dataset_version().version:
+        # A lagging replica or the snapshot would store older data under the current version
+        with primary_database():
+            statistics = refresh_property_statistics()
+            # Reload so decimals come back in their stored (string) form
+            statistics.refresh_from_db()
+    return statistics.data
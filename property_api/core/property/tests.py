@@ -0,0 +1,633 @@
+import os
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.http import QueryDict
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from . import dataset
+from .analytics import ColumnStore
+from .cache import (
+    LFUCache, SingleFlight, TwoTierCache, get_lfu_stats, hash_key_parts, normalized_params, property_cache
+)
+from .dataset import bump_dataset_version
+from .history import record_property_snapshots
+from .merging import merge_sources, pin_key
+from .districts import DISTRICT_CODE_FIELDS, sync_districts
+from .models import Property, PropertyChange
+from .query_shapes import QUERY_SHAPES_KEY, get_query_shapes, propose_index, record_query_shape
+from .routers import _use_primary
+from .statistics import compute_property_statistics, get_property_statistics
+from .views import PropertyListView
+
+
+# Filter combinations the list endpoint supports -> indexes the plan may use
+INDEXED_QUERIES = [
+    ({'class_code': '211'}, {'properties_class_pin_idx'}),
+    ({'zip_code': '60620'}, {'properties_zip_class_pin_idx'}),
+    ({'zip_code': '60620', 'class_code': '211'}, {'properties_zip_class_pin_idx'}),
+    ({'ward_num': '17'}, {'properties_ward_class_pin_idx'}),
+    ({'ward_num': '17', 'class_code': '211'}, {'properties_ward_class_pin_idx'}),
+    ({'vacancy_type': 'VACANT'}, {'properties_vacancy_pin_idx'}),
+    ({'vacancy_type': 'VACANT', 'class_code': '211'}, {'properties_vacancy_pin_idx', 'properties_class_pin_idx'}),
+    ({'ordering': 'zip_code'}, {'properties_zip_class_pin_idx'}),
+    ({'ordering': '-ward_num'}, {'properties_ward_class_pin_idx'}),
+]
+
+
+# Plans are checked against the test database, not a snapshot or replica
+@override_settings(PROPERTY_SNAPSHOT_PATH='', PROPERTY_READ_REPLICAS=[])
+class PropertyListIndexTests(TestCase):
+    """
+    EXPLAIN the queries the list endpoint builds and check each supported
+    filter combination is answered from an index rather than a table scan
+    """
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # The test table is tiny, so make the planner show which index it would use
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+    def list_queryset(self, params):
+        view = PropertyListView()
+        view.request = Request(APIRequestFactory().get('/', params))
+        view.format_kwarg = None
+        return view.filter_queryset(view.get_queryset())
+
+    def test_supported_filters_use_an_index(self):
+        for params, indexes in INDEXED_QUERIES:
+            with self.subTest(params=params):
+                plan = self.list_queryset(params).explain()
+                self.assertTrue(
+                    any(index in plan for index in indexes),
+                    f'Expected one of {sorted(indexes)} in plan:\n{plan}'
+                )
+
+    def test_vacancy_index_is_partial(self):
+        index = next(index for index in Property._meta.indexes if index.name == 'properties_vacancy_pin_idx')
+        self.assertIsNotNone(index.condition)
+
+    def test_covered_shapes_need_no_new_index(self):
+        self.assertIsNone(propose_index(Property, (('class_code',), ('pin',))))
+        self.assertIsNone(propose_index(Property, ((), ('pin',))))
+
+    def test_proposed_index_is_partial_on_nullable_filters(self):
+        index = propose_index(Property, (('mailing_state', 'property_city'), ('pin',)))
+        self.assertEqual(index.fields, ['mailing_state', 'property_city', 'pin'])
+        self.assertIn('mailing_state__isnull', str(index.condition))
+        self.assertIn('property_city__isnull', str(index.condition))
+
+
+class QueryShapeTests(TestCase):
+    """Recorded shapes stay listed even when a concurrent registration overwrote theirs"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lost_registration_is_repaired(self):
+        shape = (('class_code',), ('pin',))
+        record_query_shape(shape)
+        # Another shape's registration raced this one and won
+        cache.set(QUERY_SHAPES_KEY, {}, timeout=None)
+        record_query_shape(shape)
+        self.assertEqual(get_query_shapes(), [(shape, 2)])
+
+
+COUNTY_CSV = os.path.join(settings.BASE_DIR, '..', 'data', 'common_county_data_complete.csv')
+
+
+@override_settings(PROPERTY_SNAPSHOT_PATH='', PROPERTY_READ_REPLICAS=[])
+class DeltaImportTests(TestCase):
+    """A delta import touches and logs only the rows whose CSV content changed"""
+
+    def import_county(self, csv_path, *args):
+        call_command('import_property_data', '--csv-path', csv_path, *args, stdout=StringIO())
+
+    def test_delta_applies_only_changed_rows(self):
+        self.import_county(COUNTY_CSV)
+        frame = pd.read_csv(COUNTY_CSV, dtype=str, keep_default_na=False)
+        changed_pin, deleted_pin = frame.loc[0, 'pin'], frame.loc[1, 'pin']
+        frame.loc[0, 'township_name'] = 'Changed'
+        frame = frame.drop(index=1)
+
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as csv_file:
+            frame.to_csv(csv_file, index=False)
+        self.addCleanup(os.unlink, csv_file.name)
+        self.import_county(csv_file.name, '--delta')
+
+        self.assertEqual(
+            set(PropertyChange.objects.values_list('pin', 'action')),
+            {(changed_pin, PropertyChange.UPDATED), (deleted_pin, PropertyChange.DELETED)},
+        )
+        self.assertEqual(Property.objects.get(pin=changed_pin).township_name, 'Changed')
+        self.assertFalse(Property.objects.filter(pin=deleted_pin).exists())
+        self.assertFalse(PropertyChange.objects.filter(dataset_version__isnull=True).exists())
+
+        self.import_county(csv_file.name, '--delta')
+        self.assertEqual(PropertyChange.objects.count(), 2)
+
+    def test_failed_delta_leaves_no_unstamped_changes(self):
+        self.import_county(COUNTY_CSV)
+        frame = pd.read_csv(COUNTY_CSV, dtype=str, keep_default_na=False)
+        frame.loc[0, 'township_name'] = 'Changed'
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as csv_file:
+            frame.to_csv(csv_file, index=False)
+        self.addCleanup(os.unlink, csv_file.name)
+
+        with mock.patch(
+            'core.property.management.commands.import_property_data.bump_dataset_version',
+            side_effect=RuntimeError('crashed'),
+        ):
+            with self.assertRaises(CommandError):
+                self.import_county(csv_file.name, '--delta')
+
+        self.assertFalse(PropertyChange.objects.exists())
+        self.assertNotEqual(Property.objects.get(pin=frame.loc[0, 'pin']).township_name, 'Changed')
+
+    def test_malformed_numeric_cell_fails_only_its_row(self):
+        frame = pd.read_csv(COUNTY_CSV, dtype=str, keep_default_na=False)
+        frame.loc[0, 'ward_num'] = 'N/A?'
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as csv_file:
+            frame.to_csv(csv_file, index=False)
+        self.addCleanup(os.unlink, csv_file.name)
+
+        output = StringIO()
+        call_command('import_property_data', '--csv-path', csv_file.name, stdout=output)
+
+        self.assertIn("Invalid ward_num value: 'N/A?'", output.getvalue())
+        self.assertFalse(Property.objects.filter(pin=frame.loc[0, 'pin']).exists())
+        self.assertEqual(Property.objects.count(), frame['pin'].nunique() - 1)
+
+
+SSA32_CSV = os.path.join(settings.BASE_DIR, '..', 'data', 'SSA 32 Properties - SSA 32 Properties.csv')
+
+
+@override_settings(PROPERTY_SNAPSHOT_PATH='', PROPERTY_READ_REPLICAS=[])
+class SSA32ImportTests(TestCase):
+    """Re-importing an SSA 32 row updates it in place"""
+
+    def test_reimport_advances_updated_at(self):
+        frame = pd.read_csv(SSA32_CSV, dtype=str, keep_default_na=False).head(1)
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as csv_file:
+            frame.to_csv(csv_file, index=False)
+        self.addCleanup(os.unlink, csv_file.name)
+
+        call_command('import_ssa32_data', csv_file.name, stdout=StringIO())
+        first = Property.objects.get()
+        output = StringIO()
+        call_command('import_ssa32_data', csv_file.name, stdout=output)
+
+        self.assertIn('Updated: 1', output.getvalue())
+        self.assertGreater(Property.objects.get(pk=first.pk).updated_at, first.updated_at)
+
+
+class MergeSourcesTests(TestCase):
+    """Sources are joined on normalized PIN, each field following its precedence"""
+
+    def test_fields_follow_precedence(self):
+        county = pd.DataFrame(
+            {'pin': ['20283210300000'], 'township_name': ['Lake'], 'property_address': [None]},
+            index=['20283210300000'],
+        )
+        ssa32_pins = ['20-28-321-030-0000', '20-28-321-031-0000']
+        ssa32 = pd.DataFrame(
+            {'pin': [pin_key(pin) for pin in ssa32_pins], 'township_name': ['South Chicago'] * 2,
+             'property_address': ['754 W 79TH ST', '750 W 79TH ST']},
+            index=[pin_key(pin) for pin in ssa32_pins],
+        )
+        merged = merge_sources(
+            {'county': county, 'ssa32': ssa32},
+            {'default': ['county', 'ssa32'], 'property_address': ['ssa32']},
+        )
+
+        self.assertEqual(sorted(merged.index), ['20283210300000', '20283210310000'])
+        self.assertEqual(merged.loc['20283210300000', 'township_name'], 'Lake')
+        self.assertEqual(merged.loc['20283210310000', 'township_name'], 'South Chicago')
+        self.assertEqual(merged.loc['20283210300000', 'property_address'], '754 W 79TH ST')
+
+
+def reset_dataset_version():
+    """Forget dataset versions cached by earlier tests, whose database rows were rolled back"""
+    cache.clear()
+    property_cache.backend.clear_local()
+    dataset._local_dataset_version = (None, 0.0)
+
+
+@override_settings(PROPERTY_SINGLE_FLIGHT_WAIT=0.2, PROPERTY_SINGLE_FLIGHT_POLL_INTERVAL=0.01)
+class SingleFlightTests(TestCase):
+    """Concurrent misses recompute once, and stale values never cross a dataset version"""
+
+    def setUp(self):
+        reset_dataset_version()
+        self.backend = LocMemCache('single-flight-tests', {})
+        self.backend.clear()
+        self.single_flight = SingleFlight(self.backend)
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        def compute():
+            calls.append(None)
+            time.sleep(0.05)
+            return 'fresh'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.single_flight.get_or_set('key', compute, 60)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ['fresh'] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.single_flight._locks, {})
+
+    def test_expired_entry_is_served_stale_while_another_process_recomputes(self):
+        self.backend.set('key:stale', 'stale')
+        self.backend.add('key:lease', True)
+        value = self.single_flight.get_or_set('key', lambda: self.fail('recomputed'), 60, stale_key='key:stale')
+        self.assertEqual(value, 'stale')
+
+    def test_stale_value_is_not_served_for_a_new_version(self):
+        self.assertEqual(property_cache.get_or_set('test', (), lambda: 'version 1'), 'version 1')
+        bump_dataset_version()
+        # Another process is slow to recompute the entry for the new version
+        cache.add(f'{property_cache.make_key("test")}:lease', True)
+        self.assertEqual(property_cache.get_or_set('test', (), lambda: 'version 2'), 'version 2')
+
+
+def create_property(pin, **fields):
+    """Create a property with placeholder values for the required columns"""
+    defaults = {
+        'pin10': pin[:10], 'year': 2024, 'class_code': '211', 'row_id': pin,
+        'longitude': -87.64, 'latitude': 41.75, 'triad_name': 'City', 'triad_code': 1,
+        'township_name': 'Lake', 'township_code': 70, 'nbhd_code': '70100', 'tax_code': '70001',
+    }
+    return Property.objects.create(pin=pin, **{**defaults, **fields})
+
+
+@override_settings(
+    PROPERTY_SNAPSHOT_PATH='', PROPERTY_READ_REPLICAS=[],
+    PROPERTY_SINGLE_FLIGHT_WAIT=0.2, PROPERTY_SINGLE_FLIGHT_POLL_INTERVAL=0.01,
+)
+class ConditionalGetTests(TestCase):
+    """An ETag from before an import never revalidates the new version's data"""
+
+    def setUp(self):
+        reset_dataset_version()
+        self.property = create_property('20283210300000')
+
+    def test_statistics_after_version_bump(self):
+        url = '/api/v1/properties/stats/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_properties'], 1)
+        old_etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=old_etag).status_code, 304)
+
+        create_property('20283210310000')
+        version = bump_dataset_version().version
+        # Another worker has started recomputing both cache layers for the new version
+        query_key = hash_key_parts(normalized_params(QueryDict()), '')
+        cache.add(f'property:compressed:{version}:testserver{url}:{query_key}:lease', True)
+        cache.add(f'{property_cache.make_key("stats")}:lease', True)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=old_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], old_etag)
+        self.assertEqual(response.json()['total_properties'], 2)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_errors_carry_no_validators(self):
+        for url, status_code in (
+            ('/api/v1/properties/analytics/?group_by=unknown', 400),
+            ('/api/v1/properties/00000000000000/history/', 404),
+            (f'/api/v1/properties/{self.property.pin}/history/?as_of=1900', 404),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status_code)
+                self.assertNotIn('ETag', response)
+                self.assertNotIn('Last-Modified', response)
+
+    def test_detail_after_version_bump(self):
+        url = f'/api/v1/properties/{self.property.pin}/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        old_etag = response['ETag']
+
+        Property.objects.filter(pk=self.property.pk).update(township_name='Hyde Park')
+        bump_dataset_version()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=old_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], old_etag)
+        self.assertEqual(response.json()['township_name'], 'Hyde Park')
+
+
+@override_settings(PROPERTY_SNAPSHOT_PATH='', PROPERTY_READ_REPLICAS=[])
+class PropertyStatisticsTests(TestCase):
+    """Statistics are recomputed from the primary once their version is behind"""
+
+    def setUp(self):
+        reset_dataset_version()
+        create_property('20283210300000')
+
+    def test_outdated_statistics_are_recomputed_from_the_primary(self):
+        routed_to_primary = []
+
+        def compute():
+            routed_to_primary.append(_use_primary.get())
+            return compute_property_statistics()
+
+        with mock.patch('core.property.statistics.compute_property_statistics', compute):
+            self.assertEqual(get_property_statistics()['total_properties'], 1)
+            self.assertEqual(get_property_statistics()['total_properties'], 1)
+            create_property('20283210310000')
+            bump_dataset_version()
+            self.assertEqual(get_property_statistics()['total_properties'], 2)
+
+        self.assertEqual(routed_to_primary, [True, True])
+
+
+class LFUCacheTests(TestCase):
+    """The LFU cache evicts its least used entry, resets on a new version and publishes its stats"""
+
+    def setUp(self):
+        reset_dataset_version()
+
+    def test_evicts_least_frequently_used(self):
+        lfu = LFUCache(2)
+        lfu.get_or_set('a', lambda: 1)
+        lfu.get_or_set('a', lambda: self.fail('recomputed'))
+        lfu.get_or_set('b', lambda: 2)
+        lfu.get_or_set('c', lambda: 3)
+
+        self.assertEqual(lfu.get_or_set('a', lambda: None), 1)
+        self.assertIsNone(lfu.get_or_set('b', lambda: None))
+        self.assertEqual(lfu.stats()['hits'], 2)
+
+    def test_new_dataset_version_empties_the_cache(self):
+        lfu = LFUCache(2)
+        lfu.get_or_set('a', lambda: 'version 1')
+        bump_dataset_version()
+        self.assertEqual(lfu.get_or_set('a', lambda: 'version 2'), 'version 2')
+
+    def test_named_cache_publishes_its_stats(self):
+        lfu = LFUCache(2, name='test')
+        lfu.get_or_set('a', lambda: 1)
+        lfu.get_or_set('a', lambda: 1)
+
+        stats = [item for item in get_lfu_stats() if item['cache'] == 'test']
+        self.assertEqual(len(stats), 1)
+        # Published on the first lookup, then not again within the interval
+        self.assertEqual((stats[0]['hits'], stats[0]['misses']), (0, 1))
+
+        output = StringIO()
+        call_command('search_cache_stats', stdout=output)
+        self.assertIn('test: 0.0% of 1 lookups across workers', output.getvalue())
+
+
+@override_settings(PROPERTY_SNAPSHOT_PATH='', PROPERTY_READ_REPLICAS=[])
+class SearchTests(TestCase):
+    """Search matches the query as given, while its cache key ignores case"""
+
+    def setUp(self):
+        reset_dataset_version()
+        create_property('20283210300000', chicago_community_area_name='AUBURN GRESHAM')
+
+    def test_inner_whitespace_is_matched_literally(self):
+        url = '/api/v1/properties/search/'
+        self.assertEqual(self.client.get(url, {'q': ' auburn gresham '}).json()['count'], 1)
+        self.assertEqual(self.client.get(url, {'q': 'auburn  gresham'}).json()['count'], 0)
+        self.assertEqual(self.client.get(url, {'q': 'Auburn Gresham'}).json()['query'], 'Auburn Gresham')
+
+
+class TwoTierCacheTests(TestCase):
+    """The worker-local tier serves repeat reads and is dropped on a new dataset version"""
+
+    def setUp(self):
+        reset_dataset_version()
+        self.backend = LocMemCache('two-tier-tests', {})
+        self.backend.clear()
+        self.two_tier = TwoTierCache(backend=self.backend, maxsize=2, ttl=60)
+
+    def test_reads_are_served_from_the_local_tier(self):
+        self.two_tier.set('a', 1)
+        self.backend.delete('a')
+        self.assertEqual(self.two_tier.get('a'), 1)
+
+    def test_local_tier_is_bounded(self):
+        for key in 'abc':
+            self.two_tier.set(key, key)
+        self.backend.clear()
+        self.assertIsNone(self.two_tier.get('a'))
+        self.assertEqual(self.two_tier.get('c'), 'c')
+
+    def test_new_dataset_version_drops_the_local_tier(self):
+        self.two_tier.set('a', 'version 1')
+        bump_dataset_version()
+        self.backend.set('a', 'version 2')
+        self.assertEqual(self.two_tier.get('a'), 'version 2')
+
+
+# District kind -> (code stored on the property, district name)
+DISTRICTS = {
+    kind: (f'{index}', f'{kind.replace("_", " ").title()} {index}')
+    for index, kind in enumerate(DISTRICT_CODE_FIELDS, start=1)
+}
+DISTRICT_NAMES = {f'{kind}_name': name for kind, (_, name) in DISTRICTS.items()}
+
+
+def district_codes():
+    """Property field values for DISTRICTS; the TIF district number is a float column"""
+    return {
+        DISTRICT_CODE_FIELDS[kind]: float(code) if kind == 'tax_tif_district' else code
+        for kind, (code, _) in DISTRICTS.items()
+    }
+
+
+@override_settings(PROPERTY_SNAPSHOT_PATH='', PROPERTY_READ_REPLICAS=[])
+class DistrictNameTests(TestCase):
+    """District names come from the District table but keep their place in the payloads"""
+
+    def setUp(self):
+        reset_dataset_version()
+        sync_districts({(kind, code): name for kind, (code, name) in DISTRICTS.items()})
+        self.property = create_property('20283210300000', **district_codes())
+        self.url = f'/api/v1/properties/{self.property.pin}/'
+
+    def test_detail_and_sub_resources_return_names(self):
+        detail = self.client.get(self.url).json()
+        self.assertEqual({key: detail[key] for key in DISTRICT_NAMES}, DISTRICT_NAMES)
+
+        for sub_resource, prefix in (('schools', 'school_'), ('tax', 'tax_')):
+            with self.subTest(sub_resource=sub_resource):
+                data = self.client.get(f'{self.url}{sub_resource}/').json()
+                expected = {key: name for key, name in DISTRICT_NAMES.items() if key.startswith(prefix)}
+                self.assertEqual({key: data.get(key) for key in expected}, expected)
+
+    def test_sparse_fieldset_projects_district_names(self):
+        data = self.client.get(self.url, {'fields': 'pin,tax_park_district_name,tax_tif_district_name'}).json()
+        self.assertEqual(data, {
+            'pin': self.property.pin,
+            'tax_park_district_name': DISTRICT_NAMES['tax_park_district_name'],
+            'tax_tif_district_name': DISTRICT_NAMES['tax_tif_district_name'],
+        })
+
+    def test_list_payload_is_unchanged(self):
+        result = self.client.get('/api/v1/properties/').json()['results'][0]
+        self.assertEqual(set(result), {
+            'pin', 'pin10', 'coordinates', 'address_display', 'chicago_community_area_name',
+            'zip_code', 'ward_num', 'township_name', 'class_code', 'property_address',
+            'property_city', 'property_state', 'total_assessed_value', 'vacancy_type',
+            'mailing_name', 'year', 'square_footage_land', 'land_assessed_value',
+            'building_assessed_value', 'taxpayer_id', 'mailing_address', 'mailing_city',
+            'mailing_state', 'mailing_zip', 'tax_code', 'assessor_office_link',
+        })
+
+
+class DistrictMigrationTests(TransactionTestCase):
+    """Migrating 0004 -> 0006 moves the name columns into District without losing any"""
+
+    migrate_from = [('property', '0004_propertystatistics')]
+    migrate_to = [('property', '0006_remove_property_district_names')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_names_move_to_district_table(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        old_apps = executor.loader.project_state(self.migrate_from).apps
+        old_apps.get_model('property', 'Property').objects.create(
+            pin='20283210300000', pin10='2028321030', year=2024, class_code='211', row_id='1',
+            longitude=-87.64, latitude=41.75, triad_name='City', triad_code=1, township_name='Lake',
+            township_code=70, nbhd_code='70100', tax_code='70001',
+            **district_codes(), **DISTRICT_NAMES,
+        )
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.migrate_to)
+        new_apps = executor.loader.project_state(self.migrate_to).apps
+
+        self.assertEqual(
+            dict(new_apps.get_model('property', 'District').objects.values_list('kind', 'name')),
+            {kind: name for kind, (_, name) in DISTRICTS.items()},
+        )
+        self.assertEqual(
+            dict(new_apps.get_model('property', 'District').objects.values_list('kind', 'code')),
+            {kind: code for kind, (code, _) in DISTRICTS.items()},
+        )
+
+
+@override_settings(PROPERTY_SNAPSHOT_PATH='', PROPERTY_READ_REPLICAS=[])
+class PropertyHistoryTests(TestCase):
+    """Yearly snapshots store deltas, and as_of folds them back into full rows"""
+
+    def setUp(self):
+        reset_dataset_version()
+        call_command('import_property_data', '--csv-path', COUNTY_CSV, stdout=StringIO())
+        self.property = Property.objects.order_by('pin').first()
+        self.year = self.property.year
+        self.url = f'/api/v1/properties/{self.property.pin}/history/'
+
+    def next_year(self, **changes):
+        """Load the property's next tax year with the given changes and snapshot it"""
+        Property.objects.filter(pk=self.property.pk).update(year=self.year + 1, **changes)
+        record_property_snapshots()
+        bump_dataset_version()
+
+    def test_history_holds_only_changed_columns(self):
+        self.next_year(township_name='Changed', ward_num=99)
+
+        history = self.client.get(self.url).json()['history']
+        self.assertEqual([entry['year'] for entry in history], [self.year, self.year + 1])
+        self.assertEqual(history[0]['changes']['township_name'], self.property.township_name)
+        self.assertEqual(history[1]['changes'], {'township_name': 'Changed', 'ward_num': 99})
+
+        limited = self.client.get(self.url, {'fields': 'ward_num'}).json()['history']
+        self.assertEqual([entry['changes'] for entry in limited], [{'ward_num': self.property.ward_num}, {'ward_num': 99}])
+
+    def test_as_of_reconstructs_each_year(self):
+        self.next_year(township_name='Changed')
+
+        before = self.client.get(self.url, {'as_of': self.year}).json()
+        self.assertEqual(before['year'], self.year)
+        self.assertEqual(before['values']['township_name'], self.property.township_name)
+
+        after = self.client.get(self.url, {'as_of': self.year + 5}).json()
+        self.assertEqual(after['year'], self.year + 1)
+        self.assertEqual(after['values']['township_name'], 'Changed')
+        self.assertEqual(after['values']['class_code'], self.property.class_code)
+
+        self.assertEqual(self.client.get(self.url, {'as_of': self.year - 1}).status_code, 404)
+
+    def test_reimporting_a_year_replaces_its_delta(self):
+        self.next_year(township_name='Changed')
+        self.next_year(township_name='Corrected')
+
+        history = self.client.get(self.url).json()['history']
+        self.assertEqual(len(history), 2)
+        self.assertEqual(history[1]['changes'], {'township_name': 'Corrected'})
+
+
+class ColumnStoreTests(TestCase):
+    """Group-by kernels against a small dataset with known answers"""
+
+    def setUp(self):
+        for index, (class_code, value) in enumerate(
+            [('211', 10), ('211', 20), ('211', 30), ('211', None), ('299', 5)]
+        ):
+            create_property(f'2028321030000{index}', class_code=class_code, total_assessed_value=value)
+        # Small chunks, so the store is assembled from several
+        self.store = ColumnStore.load(chunk_size=2)
+
+    def test_grouped_metrics(self):
+        rows, _ = self.store.aggregate(
+            group_by=['class_code'],
+            metrics=[
+                ('count', None), ('sum', 'total_assessed_value'), ('mean', 'total_assessed_value'),
+                ('min', 'total_assessed_value'), ('max', 'total_assessed_value'),
+                ('median', 'total_assessed_value'), ('p25', 'total_assessed_value'),
+            ],
+        )
+        self.assertEqual(rows, [
+            {'class_code': '211', 'count': 4, 'sum_total_assessed_value': 60.0,
+             'mean_total_assessed_value': 20.0, 'min_total_assessed_value': 10.0,
+             'max_total_assessed_value': 30.0, 'median_total_assessed_value': 20.0,
+             'p25_total_assessed_value': 15.0},
+            {'class_code': '299', 'count': 1, 'sum_total_assessed_value': 5.0,
+             'mean_total_assessed_value': 5.0, 'min_total_assessed_value': 5.0,
+             'max_total_assessed_value': 5.0, 'median_total_assessed_value': 5.0,
+             'p25_total_assessed_value': 5.0},
+        ])
+
+    def test_histogram_and_filters(self):
+        rows, bin_edges = self.store.aggregate(metrics=[('histogram', 'total_assessed_value')], bins=2)
+        self.assertEqual(bin_edges, {'total_assessed_value': [5.0, 17.5, 30.0]})
+        self.assertEqual(rows, [{'histogram_total_assessed_value': [2, 2]}])
+
+        rows, _ = self.store.aggregate(
+            metrics=[('median', 'total_assessed_value')], filters={'class_code': '211'}
+        )
+        self.assertEqual(rows, [{'median_total_assessed_value': 20.0}])
@@ -4,23 +4,29 @@ from . import views
 app_name = 'property'
 
 urlpatterns = [
-    # Property list and detail views
+    # Property list and export views
     path('', views.PropertyListView.as_view(), name='property-list'),
-    path('<str:pin>/', views.PropertyDetailView.as_view(), name='property-detail'),
+    path('export/', views.PropertyExportView.as_view(), name='property-export'),
     
     # Search endpoints
     path('search/', views.property_search, name='property-search'),
     path('autocomplete/', views.autocomplete_search, name='autocomplete-search'),
     path('nearby/', views.property_nearby, name='property-nearby'),
     
-    # Specialized information endpoints
-    path('<str:pin>/schools/', views.PropertySchoolInfoView.as_view(), name='property-schools'),
-    path('<str:pin>/tax/', views.PropertyTaxInfoView.as_view(), name='property-tax'),
-    path('<str:pin>/environment/', views.PropertyEnvironmentalView.as_view(), name='property-environment'),
-    
     # Map data endpoints
     path('geojson/', views.property_geojson, name='property-geojson'),
     
     # Statistics endpoint
     path('stats/', views.property_statistics, name='property-statistics'),
-] 
\ No newline at end of file
+    path('analytics/', views.property_analytics, name='property-analytics'),
+    
+    # Property detail view (after the fixed paths, which it would otherwise shadow)
+    path('<str:pin>/', views.PropertyDetailView.as_view(), name='property-detail'),
+    
+    # Specialized information endpoints
+    path('<str:pin>/schools/', views.PropertySchoolInfoView.as_view(), name='property-schools'),
+    path('<str:pin>/tax/', views.PropertyTaxInfoView.as_view(), name='property-tax'),
+    path('<str:pin>/environment/', views.PropertyEnvironmentalView.as_view(), name='property-environment'),
+    path('<str:pin>/bundle/', views.PropertyBundleView.as_view(), name='property-bundle'),
+    path('<str:pin>/history/', views.property_history, name='property-history'),
+]
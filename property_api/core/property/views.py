@@ -1,21 +1,122 @@
+from functools import wraps
+from itertools import islice
+
+from django.conf import settings
 from django.db.models import Q, Count
 from django.db import models
-from django.http import JsonResponse
-from rest_framework import generics, status, filters
+from django.http import StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from rest_framework import generics, status, filters, serializers
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.settings import api_settings
 from django_filters.rest_framework import DjangoFilterBackend
 
+from core.util.renderers import ORJSONRenderer, ORJSONResponse
+
 from .models import Property
+from .cache import (
+    cache_compressed_response, normalized_params, normalize_search_query,
+    property_cache, search_cache, autocomplete_cache
+)
+from .renderers import (
+    MessagePackRenderer, ArrowIPCRenderer, CSVRenderer, NDJSONRenderer,
+    ParquetRenderer, StreamingRenderer, arrow_schema
+)
+from .dataset import (
+    dataset_etag, dataset_last_modified, property_etag, property_last_modified
+)
+from .query_shapes import query_shape, record_query_shape
+from .history import SNAPSHOT_FIELDS, get_property_as_of, get_property_history
+from .statistics import get_property_statistics
+from .analytics import (
+    AGGREGATE_FUNCTIONS, CATEGORICAL_COLUMNS, NUMERIC_COLUMNS, get_column_store
+)
 from .serializers import (
     PropertySummarySerializer, PropertyDetailSerializer,
     PropertyLocationSerializer, PropertySchoolInfoSerializer,
     PropertyTaxInfoSerializer, PropertyEnvironmentalSerializer,
-    PropertyGeoJSONSerializer
+    PropertyGeoJSONSerializer, parse_field_list
 )
 
 
+def project_queryset(queryset, serializer_class, projection):
+    """Defer every column the projected serializer does not read"""
+    if projection is None:
+        return queryset
+    return queryset.only(*serializer_class.projected_model_fields(projection))
+
+
+class ProjectedQuerysetMixin:
+    """
+    Apply ?fields= / ?exclude= to both the queryset and the serializer.
+    The serializer's SparseFieldsetMixin resolves the projection; this
+    defers the unread columns and passes the projection in the context.
+    """
+
+    def get_projection(self):
+        if not hasattr(self, '_projection'):
+            self._projection = self.get_serializer_class().resolve_projection(
+                self.request.query_params
+            )
+        return self._projection
+
+    def get_queryset(self):
+        return project_queryset(
+            super().get_queryset(), self.get_serializer_class(), self.get_projection()
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['projection'] = self.get_projection()
+        return context
+
+
+class CachedRetrieveMixin:
+    """
+    Serve retrieve responses from the dataset-versioned property cache,
+    keyed by view, lookup value and normalized query parameters
+    """
+
+    def get(self, request, *args, **kwargs):
+        data = property_cache.get_or_set(
+            type(self).__name__,
+            (kwargs[self.lookup_field], normalized_params(request.query_params)),
+            # Plain dict: the worker-local tier keeps the object itself, and a
+            # ReturnDict would keep its serializer and model instance alive with it
+            lambda: dict(super(CachedRetrieveMixin, self).get(request, *args, **kwargs).data)
+        )
+        return Response(data)
+
+
+def conditional_get(etag_func, last_modified_func):
+    """
+    django.views.decorators.http.condition, but validators are only sent
+    with successful responses, so a client never revalidates an error to 304
+    """
+    def decorator(view):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.status_code >= 400:
+                response.headers.pop('ETag', None)
+                response.headers.pop('Last-Modified', None)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+# 304 on a matching If-None-Match / If-Modified-Since, before the view queries anything
+dataset_conditional = conditional_get(dataset_etag, dataset_last_modified)
+property_conditional = conditional_get(property_etag, property_last_modified)
+
+
 class PropertyPagination(PageNumberPagination):
     """Custom pagination for property listings"""
     page_size = 25
@@ -23,13 +124,10 @@ class PropertyPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class PropertyListView(generics.ListAPIView):
+class PropertyFilterMixin:
     """
-    List all properties with optional filtering
+    Filtering, search and ordering shared by the list and export endpoints
     """
-    queryset = Property.objects.all()
-    serializer_class = PropertySummarySerializer
-    pagination_class = PropertyPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     
     filterset_fields = [
@@ -45,30 +143,99 @@ class PropertyListView(generics.ListAPIView):
     ordering_fields = ['pin', 'zip_code', 'ward_num']
     ordering = ['pin']
 
+    def filter_queryset(self, queryset):
+        if settings.PROPERTY_LOG_QUERY_SHAPES:
+            # Only requests that reach the database; cached responses never get here
+            record_query_shape(query_shape(
+                self.request.query_params, self.filterset_fields,
+                self.ordering_fields, self.ordering
+            ))
+        return super().filter_queryset(queryset)
 
-class PropertyDetailView(generics.RetrieveAPIView):
+
+@method_decorator(cache_compressed_response, name='dispatch')
+class PropertyListView(ProjectedQuerysetMixin, PropertyFilterMixin, generics.ListAPIView):
     """
-    Retrieve detailed information for a specific property by PIN
+    List all properties with optional filtering
     """
     queryset = Property.objects.all()
-    serializer_class = PropertyDetailSerializer
-    lookup_field = 'pin'
+    serializer_class = PropertySummarySerializer
+    pagination_class = PropertyPagination
+    renderer_classes = [
+        *api_settings.DEFAULT_RENDERER_CLASSES, MessagePackRenderer, ArrowIPCRenderer
+    ]
 
 
-@api_view(['GET'])
-def property_search(request):
+class PropertyExportView(PropertyFilterMixin, generics.GenericAPIView):
     """
-    Advanced search endpoint for properties
-    Supports search by PIN, partial PIN, ZIP code, community area
+    Export the whole filtered property set in one response.
+    
+    CSV, NDJSON, Parquet and Arrow are streamed: rows are read from a
+    server-side cursor in chunks and encoded chunk by chunk, so memory stays
+    flat regardless of result size. JSON and MessagePack return the columns
+    as a single column-wise document.
     """
-    query = request.GET.get('q', '').strip()
-    search_type = request.GET.get('type', 'all')  # all, pin, zip, area
-    limit = min(int(request.GET.get('limit', 50)), 100)
+    queryset = Property.objects.all()
+    renderer_classes = [
+        ORJSONRenderer, MessagePackRenderer, ArrowIPCRenderer,
+        CSVRenderer, NDJSONRenderer, ParquetRenderer
+    ]
     
-    if not query:
-        return Response({'error': 'Query parameter "q" is required'}, 
-                       status=status.HTTP_400_BAD_REQUEST)
+    def get_columns(self):
+        """Model columns selected by ?fields= / ?exclude=, all columns by default"""
+        available = [field.name for field in Property._meta.concrete_fields]
+        fields = parse_field_list(self.request.query_params.get('fields', ''))
+        exclude = parse_field_list(self.request.query_params.get('exclude', ''))
+        
+        unknown = [name for name in fields + exclude if name not in available]
+        if unknown:
+            raise serializers.ValidationError(
+                {'fields': f"Unknown field(s): {', '.join(unknown)}"}
+            )
+        
+        return [name for name in fields or available if name not in exclude]
+    
+    def iter_chunks(self, queryset):
+        """Yield lists of value tuples read through a server-side cursor"""
+        chunk_size = settings.PROPERTY_EXPORT_CHUNK_SIZE
+        rows = queryset.iterator(chunk_size=chunk_size)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield chunk
     
+    def get(self, request, *args, **kwargs):
+        columns = self.get_columns()
+        queryset = self.filter_queryset(self.get_queryset()).values_list(*columns)
+        renderer = request.accepted_renderer
+        
+        if isinstance(renderer, StreamingRenderer):
+            response = StreamingHttpResponse(
+                renderer.stream(
+                    columns, self.iter_chunks(queryset), arrow_schema(Property, columns)
+                ),
+                content_type=renderer.media_type
+            )
+            response['Content-Disposition'] = f'attachment; filename="properties.{renderer.format}"'
+            return response
+        
+        values = list(zip(*queryset)) or [()] * len(columns)
+        return Response({name: list(column) for name, column in zip(columns, values)})
+
+
+@method_decorator(property_conditional, name='get')
+class PropertyDetailView(CachedRetrieveMixin, ProjectedQuerysetMixin, generics.RetrieveAPIView):
+    """
+    Retrieve detailed information for a specific property by PIN
+    """
+    queryset = Property.objects.all()
+    serializer_class = PropertyDetailSerializer
+    lookup_field = 'pin'
+
+
+def _search_properties(query, search_type, limit, projection):
+    """Run a property search and return the serialized response data"""
     # Build search filters based on type
     if search_type == 'pin':
         queryset = Property.objects.filter(
@@ -89,16 +256,44 @@ def property_search(request):
             Q(township_name__icontains=query)
         )
     
-    # Limit results and serialize
-    properties = queryset[:limit]
-    serializer = PropertySummarySerializer(properties, many=True)
+    # Limit results and serialize only the requested columns
+    properties = project_queryset(queryset, PropertySummarySerializer, projection)[:limit]
+    serializer = PropertySummarySerializer(
+        properties, many=True, context={'projection': projection}
+    )
     
-    return Response({
+    return {
         'count': queryset.count(),
-        'results': serializer.data,
+        'results': list(serializer.data),
         'query': query,
         'search_type': search_type
-    })
+    }
+
+
+@api_view(['GET'])
+def property_search(request):
+    """
+    Advanced search endpoint for properties
+    Supports search by PIN, partial PIN, ZIP code, community area
+    """
+    query = request.GET.get('q', '').strip()
+    search_type = request.GET.get('type', 'all')  # all, pin, zip, area
+    limit = min(int(request.GET.get('limit', 50)), 100)
+    
+    if not query:
+        return Response({'error': 'Query parameter "q" is required'}, 
+                       status=status.HTTP_400_BAD_REQUEST)
+    
+    projection = PropertySummarySerializer.resolve_projection(request.GET)
+    key = (normalize_search_query(query), search_type, limit, projection)
+    data = search_cache.get_or_set(
+        repr(key),
+        lambda: property_cache.get_or_set(
+            'search', key, lambda: _search_properties(query, search_type, limit, projection)
+        )
+    )
+    # The cached entry may come from a differently cased query
+    return Response({**data, 'query': query})
 
 
 @api_view(['GET'])
@@ -119,12 +314,18 @@ def property_nearby(request):
     lat_delta = radius / 111.0
     lon_delta = radius / (111.0 * abs(lat))
     
-    properties = Property.objects.filter(
-        latitude__range=(lat - lat_delta, lat + lat_delta),
-        longitude__range=(lon - lon_delta, lon + lon_delta)
+    projection = PropertyLocationSerializer.resolve_projection(request.GET)
+    properties = project_queryset(
+        Property.objects.filter(
+            latitude__range=(lat - lat_delta, lat + lat_delta),
+            longitude__range=(lon - lon_delta, lon + lon_delta)
+        ),
+        PropertyLocationSerializer, projection
     )[:limit]
     
-    serializer = PropertyLocationSerializer(properties, many=True)
+    serializer = PropertyLocationSerializer(
+        properties, many=True, context={'projection': projection}
+    )
     return Response({
         'count': properties.count(),
         'center': [lon, lat],
@@ -133,6 +334,8 @@ def property_nearby(request):
     })
 
 
+@dataset_conditional
+@cache_compressed_response
 @api_view(['GET'])
 def property_geojson(request):
     """
@@ -181,10 +384,11 @@ def property_geojson(request):
         "features": features
     }
     
-    return JsonResponse(geojson)
+    return ORJSONResponse(geojson)
 
 
-class PropertySchoolInfoView(generics.RetrieveAPIView):
+@method_decorator(property_conditional, name='get')
+class PropertySchoolInfoView(CachedRetrieveMixin, generics.RetrieveAPIView):
     """
     Get school district information for a property
     """
@@ -193,7 +397,8 @@ class PropertySchoolInfoView(generics.RetrieveAPIView):
     lookup_field = 'pin'
 
 
-class PropertyTaxInfoView(generics.RetrieveAPIView):
+@method_decorator(property_conditional, name='get')
+class PropertyTaxInfoView(CachedRetrieveMixin, generics.RetrieveAPIView):
     """
     Get tax district information for a property
     """
@@ -202,7 +407,8 @@ class PropertyTaxInfoView(generics.RetrieveAPIView):
     lookup_field = 'pin'
 
 
-class PropertyEnvironmentalView(generics.RetrieveAPIView):
+@method_decorator(property_conditional, name='get')
+class PropertyEnvironmentalView(CachedRetrieveMixin, generics.RetrieveAPIView):
     """
     Get environmental information for a property
     """
@@ -211,41 +417,165 @@ class PropertyEnvironmentalView(generics.RetrieveAPIView):
     lookup_field = 'pin'
 
 
-@api_view(['GET'])
-def property_statistics(request):
+@method_decorator(property_conditional, name='get')
+class PropertyBundleView(CachedRetrieveMixin, generics.RetrieveAPIView):
     """
-    Get summary statistics about the property database
+    Property detail plus the requested sub-resources in one response.
+    The row is loaded once and shared by every serializer.
     """
-    stats = {
-        'total_properties': Property.objects.count(),
-        'community_areas': Property.objects.values('chicago_community_area_name')
-                                          .distinct().count(),
-        'zip_codes': Property.objects.values('zip_code').distinct().count(),
-        'wards': Property.objects.values('ward_num').distinct().count(),
-        'property_classes': Property.objects.values('class_code').distinct().count(),
-    }
+    queryset = Property.objects.all()
+    serializer_class = PropertyDetailSerializer
+    lookup_field = 'pin'
     
-    # Top community areas by property count
-    top_areas = Property.objects.values('chicago_community_area_name') \
-                               .annotate(count=models.Count('id')) \
-                               .order_by('-count')[:10]
+    include_serializers = {
+        'schools': PropertySchoolInfoSerializer,
+        'tax': PropertyTaxInfoSerializer,
+        'environment': PropertyEnvironmentalSerializer,
+    }
+    # Already part of the detail payload, so not repeated in each sub-resource
+    shared_fields = ('pin', 'coordinates', 'address_display')
     
-    stats['top_community_areas'] = list(top_areas)
+    def get_includes(self):
+        includes = parse_field_list(self.request.query_params.get('include', ''))
+        available = list(self.include_serializers) + ['nearby']
+        unknown = [name for name in includes if name not in available]
+        if unknown:
+            raise serializers.ValidationError(
+                {'include': f"Unknown include(s): {', '.join(unknown)}"}
+            )
+        return includes
     
-    return Response(stats)
+    def retrieve(self, request, *args, **kwargs):
+        includes = self.get_includes()
+        instance = self.get_object()
+        context = self.get_serializer_context()
+        
+        if 'nearby' in includes:
+            # Evaluated once; the detail serializer reuses it for the count
+            context['nearby_properties'] = list(instance.nearby_properties())
+        
+        data = PropertyDetailSerializer(instance, context=context).data
+        
+        for name in includes:
+            if name == 'nearby':
+                data['nearby'] = PropertyLocationSerializer(
+                    context['nearby_properties'], many=True
+                ).data
+                continue
+            
+            sub_resource = self.include_serializers[name](instance, context=context).data
+            data[name] = {
+                key: value for key, value in sub_resource.items()
+                if key not in self.shared_fields
+            }
+        
+        return Response(data)
+
+
+def _property_history(pin, as_of, fields):
+    if as_of is None:
+        history = get_property_history(pin, fields)
+        return {'pin': pin, 'history': history} if history else None
+
+    snapshot = get_property_as_of(pin, as_of, fields)
+    if snapshot is None:
+        return None
+    year, values = snapshot
+    return {'pin': pin, 'as_of': as_of, 'year': year, 'values': values}
 
 
+@property_conditional
 @api_view(['GET'])
-def autocomplete_search(request):
+def property_history(request, pin):
     """
-    Autocomplete suggestions for search queries
+    Year-by-year history for a property, as the columns that changed each
+    tax year. With ?as_of=YEAR, returns the full property as of that year.
+    ?fields= limits the columns returned.
     """
-    query = request.GET.get('q', '').strip()
-    limit = min(int(request.GET.get('limit', 10)), 20)
-    
-    if len(query) < 2:
-        return Response({'suggestions': []})
-    
+    try:
+        as_of = int(request.GET['as_of']) if request.GET.get('as_of') else None
+    except ValueError:
+        return Response({'error': 'Invalid as_of year'},
+                       status=status.HTTP_400_BAD_REQUEST)
+
+    fields = parse_field_list(request.GET.get('fields', '')) or None
+    if fields is not None:
+        unknown = [name for name in fields if name not in SNAPSHOT_FIELDS]
+        if unknown:
+            raise serializers.ValidationError(
+                {'fields': f"Unknown field(s): {', '.join(unknown)}"}
+            )
+
+    data = property_cache.get_or_set(
+        'history', (pin, as_of, fields), lambda: _property_history(pin, as_of, fields)
+    )
+    if data is None:
+        return Response({'error': 'No history for this property'},
+                       status=status.HTTP_404_NOT_FOUND)
+    return Response(data)
+
+
+@dataset_conditional
+@cache_compressed_response
+@api_view(['GET'])
+def property_statistics(request):
+    """
+    Get summary statistics about the property database, read from the
+    statistics row materialized at the end of each import
+    """
+    return Response(property_cache.get_or_set('stats', (), get_property_statistics))
+
+
+def _parse_metrics(value):
+    """Parse ?metrics=count,median:total_assessed_value into (function, column) pairs"""
+    metrics = []
+    for term in parse_field_list(value or 'count'):
+        function, _, column = term.partition(':')
+        if function not in AGGREGATE_FUNCTIONS:
+            raise serializers.ValidationError({'metrics': f'Unknown function: {function}'})
+        if function == 'count':
+            metrics.append((function, None))
+        elif column in NUMERIC_COLUMNS:
+            metrics.append((function, column))
+        else:
+            raise serializers.ValidationError(
+                {'metrics': f"{function} needs one of: {', '.join(NUMERIC_COLUMNS)}"}
+            )
+    return metrics
+
+
+@dataset_conditional
+@cache_compressed_response
+@api_view(['GET'])
+def property_analytics(request):
+    """
+    Group-by aggregates over the in-memory column store, e.g.
+    ?group_by=class_code,ward_num&metrics=count,median:total_assessed_value
+    Categorical columns in the query string filter the rows first.
+    """
+    group_by = parse_field_list(request.GET.get('group_by', ''))
+    unknown = [name for name in group_by if name not in CATEGORICAL_COLUMNS]
+    if unknown:
+        raise serializers.ValidationError(
+            {'group_by': f"Unknown column(s): {', '.join(unknown)}"}
+        )
+    metrics = _parse_metrics(request.GET.get('metrics'))
+    try:
+        bins = min(max(int(request.GET.get('bins', 10)), 1), 100)
+    except ValueError:
+        return Response({'error': 'Invalid bins parameter'},
+                       status=status.HTTP_400_BAD_REQUEST)
+    filters = {name: request.GET[name] for name in CATEGORICAL_COLUMNS if request.GET.get(name)}
+
+    rows, bin_edges = get_column_store().aggregate(group_by, metrics, filters, bins)
+    data = {'group_by': group_by, 'filters': filters, 'results': rows}
+    if bin_edges:
+        data['bin_edges'] = bin_edges
+    return Response(data)
+
+
+def _autocomplete_suggestions(query, limit):
+    """Build PIN and community area suggestions for a partial query"""
     suggestions = []
     
     # PIN suggestions
@@ -261,4 +591,22 @@ def autocomplete_search(request):
     
     suggestions.extend([{'value': area, 'type': 'area'} for area in areas if area])
     
-    return Response({'suggestions': suggestions[:limit]}) 
\ No newline at end of file
+    return {'suggestions': suggestions[:limit]}
+
+
+@api_view(['GET'])
+def autocomplete_search(request):
+    """
+    Autocomplete suggestions for search queries
+    """
+    query = request.GET.get('q', '').strip()
+    limit = min(int(request.GET.get('limit', 10)), 20)
+    
+    if len(query) < 2:
+        return Response({'suggestions': []})
+    
+    data = autocomplete_cache.get_or_set(
+        repr((normalize_search_query(query), limit)),
+        lambda: _autocomplete_suggestions(query, limit)
+    )
+    return Response(data)
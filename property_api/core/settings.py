@@ -113,6 +113,33 @@ DATABASES = {
     'default': env.db()
 }
 
+# Immutable SQLite snapshot of the database, published by the import commands.
+# When set, API reads of property models are served from it without locks.
+PROPERTY_SNAPSHOT_PATH = env('PROPERTY_SNAPSHOT_PATH')
+
+if PROPERTY_SNAPSHOT_PATH:
+    DATABASES['property_snapshot'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{PROPERTY_SNAPSHOT_PATH}?mode=ro&immutable=1',
+        'OPTIONS': {
+            # 1 GiB memory map, 256 MiB page cache
+            'init_command': (
+                'PRAGMA query_only = 1; PRAGMA mmap_size = 1073741824; '
+                'PRAGMA cache_size = -262144; PRAGMA temp_store = MEMORY'
+            ),
+        },
+    }
+
+# Read replicas for property API traffic, as comma separated database URLs.
+# Imports always write to and read from `default`, the primary.
+PROPERTY_READ_REPLICAS = []
+
+for index, url in enumerate(env('PROPERTY_REPLICA_URLS'), start=1):
+    DATABASES[f'replica_{index}'] = {**env.db_url_config(url), 'TEST': {'MIRROR': 'default'}}
+    PROPERTY_READ_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['core.property.routers.PropertyRouter']
+
 # Caches
 
 CACHES = {
@@ -185,6 +212,10 @@ REST_FRAMEWORK = {
         'knox.auth.TokenAuthentication',
 
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.util.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'EXCEPTION_HANDLER': 'drf_standardized_errors.handler.exception_handler',
     'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.NamespaceVersioning',
 }
@@ -253,6 +284,58 @@ REST_AUTH = {
 COREAPP_CLIENTID_N_BYTES = 16
 COREAPP_SECRET_N_BYTES = 64
 
+# Core.Property
+
+PROPERTY_DATASET_VERSION_CACHE_TIMEOUT = 30 # Seconds a worker may serve a cached dataset version after an import
+PROPERTY_DATASET_VERSION_LOCAL_TTL = 1 # Seconds a worker trusts its in-memory dataset version before re-reading the shared one
+PROPERTY_CACHE_TIMEOUT = 60 * 60 # Read-through cache entries are keyed by dataset version, so this only bounds memory
+PROPERTY_LOCAL_CACHE_SIZE = 1024 # Entries in each worker's in-memory tier in front of the shared cache
+PROPERTY_LOCAL_CACHE_TTL = 30
+PROPERTY_REPLICA_MAX_VERSION_LAG = 0 # Dataset versions a replica may trail the primary by and still serve reads
+PROPERTY_REPLICA_LAG_CHECK_INTERVAL = 5 # Seconds a worker trusts a replica's last seen dataset version
+PROPERTY_SINGLE_FLIGHT_LEASE = 30 # Seconds one process may hold the recompute lease for a cache key
+PROPERTY_SINGLE_FLIGHT_WAIT = 5 # Seconds other requests wait for that recompute before doing it themselves
+PROPERTY_SINGLE_FLIGHT_POLL_INTERVAL = 0.05
+PROPERTY_SEARCH_CACHE_SIZE = 2048 # Entries in each per-worker LFU cache for search and autocomplete
+PROPERTY_SEARCH_CACHE_STATS_INTERVAL = 60 # Seconds between a worker publishing its search cache hit rates for search_cache_stats
+PROPERTY_EXPORT_CHUNK_SIZE = 2000 # Rows fetched and encoded per chunk by the streaming export
+PROPERTY_IMPORT_CHUNK_SIZE = 10000 # CSV rows the import commands parse and convert at a time
+PROPERTY_LOG_QUERY_SHAPES = True # Count list/export filter combinations for analyze_query_shapes
+PROPERTY_COMPRESSED_CACHE_TIMEOUT = 60 * 60 * 24 # Compressed payloads are keyed by dataset version, so this only bounds memory
+
+# Running API that `manage.py warm_property_caches` (and `--warm` on the import commands) sends requests to
+PROPERTY_CACHE_WARMING_URL = env('PROPERTY_CACHE_WARMING_URL')
+PROPERTY_CACHE_WARMING_TIMEOUT = 60 # Seconds to wait for each warming response
+
+# Requests sent by `manage.py warm_property_caches`
+PROPERTY_CACHE_WARMING = {
+    # Cached responses are keyed by Accept; this is what the frontend's axios client sends
+    'accept': ['application/json, text/plain, */*'],
+    'searches': ['79th', 'AUBURN GRESHAM', 'CHATHAM', '60620'],
+    'autocomplete': ['79', 'AU', 'CH'],
+    # Map extents requested by the frontend, split into tile_grid x tile_grid bounding boxes
+    'geojson_extents': [
+        {'north': 41.7600, 'south': 41.7400, 'east': -87.6000, 'west': -87.6900}, # 79th Street corridor
+    ],
+    'tile_grid': 2,
+    'detail_pins': [],
+    'sample_pins': 100,
+}
+
+# CSV files merged by `manage.py import_merged_properties`, relative to the repository root
+PROPERTY_MERGE_SOURCES = {
+    'county': 'data/common_county_data_complete.csv',
+    'corridor': 'data/79thProperties.csv',
+    'ssa32': 'data/SSA 32 Properties - SSA 32 Properties.csv',
+}
+
+# Sources each Property field may come from, highest precedence first. The first
+# source with a value for the PIN wins; fields not listed use 'default'.
+PROPERTY_MERGE_PRECEDENCE = {
+    'default': ['county', 'corridor', 'ssa32'], # SSA 32's placeholder township and triad only fill gaps
+    'property_address': ['ssa32', 'corridor'],
+}
+
 # Knox
 
 REST_KNOX = {
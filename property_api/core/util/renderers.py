@@ -0,0 +1,66 @@
+import decimal
+
+import orjson
+from django.http import HttpResponse
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def orjson_default(obj):
+    """Encode the types orjson does not handle natively"""
+    if isinstance(obj, decimal.Decimal):
+        # Match DRF: decimals are strings unless COERCE_DECIMAL_TO_STRING is off
+        return str(obj) if api_settings.COERCE_DECIMAL_TO_STRING else float(obj)
+    if isinstance(obj, Promise):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, 'tolist'):
+        # numpy scalars and arrays not covered by OPT_SERIALIZE_NUMPY
+        return obj.tolist()
+    if hasattr(obj, '__iter__'):
+        return list(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def orjson_dumps(data, indent=False):
+    """Serialize data to JSON bytes with orjson"""
+    options = ORJSON_OPTIONS | orjson.OPT_INDENT_2 if indent else ORJSON_OPTIONS
+    return orjson.dumps(data, default=orjson_default, option=options)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    Drop-in replacement for DRF's JSONRenderer backed by orjson.
+    Datetimes, UUIDs and numpy values are encoded natively. Decimals are
+    strings, or floats when COERCE_DECIMAL_TO_STRING is off, as with DRF.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        indent = False
+        if accepted_media_type:
+            # Honour "application/json; indent=N" like the stock renderer
+            _, _, params = accepted_media_type.partition(';')
+            indent = 'indent=' in params.replace(' ', '')
+
+        return orjson_dumps(data, indent=indent)
+
+
+class ORJSONResponse(HttpResponse):
+    """
+    JsonResponse equivalent for plain Django views, encoded with orjson
+    """
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=orjson_dumps(data), **kwargs)